@@ -1,10 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
-from ..models import User, SavedPaper, Tag, PaperInteraction
+from ..models import User, UserProfile, Paper, SavedPaper, Tag, PaperInteraction
 from ..schemas import MigrationData
-from ..core import get_current_active_user
+from ..core import (
+    get_current_active_user,
+    invalidate_auth_user,
+    get_or_fetch_papers,
+    strip_version,
+    rebuild_profile,
+    record_save,
+    adjust_user_counts,
+    fan_out_save
+)
 
 router = APIRouter(prefix="/migrate", tags=["migration"])
 
@@ -13,7 +22,7 @@ router = APIRouter(prefix="/migrate", tags=["migration"])
 async def import_localstorage_data(
     migration_data: MigrationData,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Import user data from localStorage to backend database
@@ -22,6 +31,8 @@ async def import_localstorage_data(
     imported_count = 0
     skipped_count = 0
     errors = []
+    # Rollbacks expire current_user, and reloading it would need I/O
+    user_id = current_user.id
 
     try:
         # Import preferences (seen papers, liked/disliked)
@@ -30,15 +41,15 @@ async def import_localstorage_data(
         # Record seen paper interactions
         if 'seenPaperIds' in preferences:
             for paper_id in preferences['seenPaperIds']:
-                existing = db.query(PaperInteraction).filter(
-                    PaperInteraction.user_id == current_user.id,
+                existing = await db.scalar(select(PaperInteraction.id).where(
+                    PaperInteraction.user_id == user_id,
                     PaperInteraction.arxiv_id == paper_id,
                     PaperInteraction.interaction_type == 'view'
-                ).first()
+                ))
 
                 if not existing:
                     interaction = PaperInteraction(
-                        user_id=current_user.id,
+                        user_id=user_id,
                         arxiv_id=paper_id,
                         interaction_type='view'
                     )
@@ -47,15 +58,15 @@ async def import_localstorage_data(
         # Record disliked papers
         if 'dislikedPaperIds' in preferences:
             for paper_id in preferences['dislikedPaperIds']:
-                existing = db.query(PaperInteraction).filter(
-                    PaperInteraction.user_id == current_user.id,
+                existing = await db.scalar(select(PaperInteraction.id).where(
+                    PaperInteraction.user_id == user_id,
                     PaperInteraction.arxiv_id == paper_id,
                     PaperInteraction.interaction_type == 'dislike'
-                ).first()
+                ))
 
                 if not existing:
                     interaction = PaperInteraction(
-                        user_id=current_user.id,
+                        user_id=user_id,
                         arxiv_id=paper_id,
                         interaction_type='dislike'
                     )
@@ -63,65 +74,80 @@ async def import_localstorage_data(
 
         # Update user preferences (topics, date range)
         if 'selectedTopics' in preferences:
-            current_user.research_interests = json.dumps(preferences['selectedTopics'])
+            current_user.research_interests = preferences['selectedTopics']
 
-        db.commit()
+        await db.commit()
+        invalidate_auth_user(user_id)
+
+        # Shared metadata comes from arXiv, not from the imported copies. Only
+        # the IDs are kept: a failed import below rolls back and expires rows
+        papers = await get_or_fetch_papers(db, [
+            paper_data['id'] for paper_data in migration_data.saved_papers if paper_data.get('id')
+        ])
+        paper_ids = {arxiv_id: paper.id for arxiv_id, paper in papers.items()}
+        await db.commit()
 
         # Import saved papers
         for paper_data in migration_data.saved_papers:
             try:
                 # Check if paper already exists
-                existing_paper = db.query(SavedPaper).filter(
-                    SavedPaper.user_id == current_user.id,
-                    SavedPaper.arxiv_id == paper_data['id']
-                ).first()
+                existing_paper = await db.scalar(select(SavedPaper.id).join(SavedPaper.paper).where(
+                    SavedPaper.user_id == user_id,
+                    Paper.base_id == strip_version(paper_data['id'])
+                ))
 
                 if existing_paper:
                     skipped_count += 1
                     continue
 
+                paper_id = paper_ids.get(paper_data['id'])
+                if paper_id is None:
+                    errors.append(f"Error importing paper {paper_data['id']}: not found on arXiv")
+                    continue
+
                 # Create new saved paper
                 new_paper = SavedPaper(
-                    user_id=current_user.id,
-                    arxiv_id=paper_data['id'],
-                    title=paper_data['title'],
-                    authors=json.dumps(paper_data['authors']),
-                    abstract=paper_data['abstract'],
-                    categories=json.dumps(paper_data['categories']),
-                    published_date=paper_data.get('publishedDate', ''),
-                    pdf_url=paper_data.get('pdfUrl'),
-                    source_url=paper_data.get('sourceUrl', ''),
+                    user_id=user_id,
+                    paper_id=paper_id,
                     notes=paper_data.get('notes', ''),
-                    is_public=1
+                    is_public=1,
+                    tags=[]
                 )
 
                 db.add(new_paper)
-                db.flush()  # Get the ID without committing
+                await db.run_sync(record_save, paper_id)
+                await db.run_sync(adjust_user_counts, user_id, saved_papers_count=1, library_version=1)
+                await db.flush()  # Get the ID without committing
+                await db.run_sync(lambda session: fan_out_save(session, new_paper, session.get(User, user_id)))
 
                 # Add tags if present
                 if 'tags' in paper_data and paper_data['tags']:
                     for tag_name in paper_data['tags']:
                         # Find or create tag
-                        tag = db.query(Tag).filter(
-                            Tag.user_id == current_user.id,
+                        tag = await db.scalar(select(Tag).where(
+                            Tag.user_id == user_id,
                             Tag.name == tag_name
-                        ).first()
+                        ))
 
                         if not tag:
-                            tag = Tag(user_id=current_user.id, name=tag_name)
+                            tag = Tag(user_id=user_id, name=tag_name)
                             db.add(tag)
-                            db.flush()
+                            await db.flush()
 
                         new_paper.tags.append(tag)
 
-                db.commit()
+                await db.commit()
                 imported_count += 1
 
             except Exception as e:
-                db.rollback()
+                await db.rollback()
                 errors.append(f"Error importing paper {paper_data.get('id', 'unknown')}: {str(e)}")
                 continue
 
+        # Imported history bypasses the incremental updates, so rebuild the profile
+        await db.run_sync(lambda session: rebuild_profile(session, user_id, session.get(UserProfile, user_id)))
+        await db.commit()
+
         return {
             "message": "Migration completed",
             "imported": imported_count,
@@ -130,7 +156,7 @@ async def import_localstorage_data(
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Migration failed: {str(e)}"
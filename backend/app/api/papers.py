@@ -1,13 +1,28 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
-from ..models import User, PaperInteraction
-from ..schemas import PaperResponse, SearchFilters, PaperInteractionCreate
-from ..core import arxiv_client, get_current_active_user, get_optional_user
+from ..models import User
+from ..schemas import PaperResponse, PaperInteractionCreate, PaperInteractionBatch
+from ..core import (
+    arxiv_client,
+    find_papers,
+    get_catalog_paper,
+    get_catalog_papers,
+    get_current_active_user,
+    get_optional_user,
+    get_seen_ids,
+    deck_manager,
+    interaction_buffer,
+    rerank,
+    load_profile
+)
+from ..config import settings
 
 router = APIRouter(prefix="/papers", tags=["papers"])
 
+MAX_BATCH_IDS = 500
+
 
 @router.get("/search", response_model=List[PaperResponse])
 async def search_papers(
@@ -19,7 +34,7 @@ async def search_papers(
     max_results: int = Query(20, ge=1, le=100, description="Maximum number of results"),
     start: int = Query(0, ge=0, description="Pagination start index"),
     current_user: Optional[User] = Depends(get_optional_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Search papers from arXiv API with filters
@@ -30,8 +45,8 @@ async def search_papers(
     if categories:
         category_list = [cat.strip() for cat in categories.split(',')]
 
-    # Fetch papers from arXiv
-    papers = await arxiv_client.search_papers(
+    papers = await find_papers(
+        db,
         query=query,
         categories=category_list,
         max_results=max_results,
@@ -43,24 +58,61 @@ async def search_papers(
 
     # If user is authenticated, filter out papers they've already interacted with
     if current_user:
-        # Get user's seen paper IDs
-        seen_interactions = db.query(PaperInteraction.arxiv_id).filter(
-            PaperInteraction.user_id == current_user.id
-        ).all()
-        seen_ids = set([interaction.arxiv_id for interaction in seen_interactions])
-
-        # Filter out seen papers
+        seen_ids = await db.run_sync(get_seen_ids, current_user.id, [paper['arxiv_id'] for paper in papers])
         papers = [paper for paper in papers if paper['arxiv_id'] not in seen_ids]
 
+        # Rerank by similarity to what the user liked and saved
+        if settings.RANKING_ENABLED:
+            papers = rerank(papers, await db.run_sync(load_profile, current_user.id))
+
     return papers
 
 
+@router.get("/deck", response_model=List[PaperResponse])
+async def get_deck(
+    count: int = Query(10, ge=1, le=50, description="Number of papers to return"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the next unseen papers from the user's prefetched deck, built from
+    their research interests. Papers leave the deck once an interaction is
+    recorded for them.
+    """
+    return await deck_manager.get_deck(current_user, count)
+
+
+@router.get("/batch", response_model=List[PaperResponse])
+async def get_papers_batch(
+    ids: str = Query(..., description="Comma-separated list of arXiv IDs"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get many papers by arXiv ID in one call, in request order.
+    Unknown IDs are omitted.
+    """
+    arxiv_ids = list(dict.fromkeys(i.strip() for i in ids.split(',') if i.strip()))
+    if len(arxiv_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_IDS} IDs can be requested at once"
+        )
+
+    # Local catalog first, then arXiv for the misses
+    found = await db.run_sync(get_catalog_papers, arxiv_ids)
+    misses = [arxiv_id for arxiv_id in arxiv_ids if arxiv_id not in found]
+    if misses:
+        found.update(await arxiv_client.lookup_papers(misses))
+
+    return [found[arxiv_id] for arxiv_id in arxiv_ids if arxiv_id in found]
+
+
 @router.get("/{arxiv_id}", response_model=PaperResponse)
-async def get_paper(arxiv_id: str):
+async def get_paper(arxiv_id: str, db: AsyncSession = Depends(get_db)):
     """Get a specific paper by arXiv ID"""
-    paper = await arxiv_client.get_paper_by_id(arxiv_id)
+    paper = await db.run_sync(get_catalog_paper, arxiv_id)
+    if not paper:
+        paper = await arxiv_client.get_paper_by_id(arxiv_id)
     if not paper:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Paper not found")
     return paper
 
@@ -68,16 +120,26 @@ async def get_paper(arxiv_id: str):
 @router.post("/interaction")
 async def record_interaction(
     interaction: PaperInteractionCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ):
     """Record user interaction with a paper (view, like, dislike)"""
-    new_interaction = PaperInteraction(
-        user_id=current_user.id,
-        arxiv_id=interaction.arxiv_id,
-        interaction_type=interaction.interaction_type
-    )
-    db.add(new_interaction)
-    db.commit()
+    interaction_buffer.add(current_user.id, interaction.arxiv_id, interaction.interaction_type)
+    deck_manager.remove(current_user.id, interaction.arxiv_id)
 
     return {"message": "Interaction recorded successfully"}
+
+
+@router.post("/interactions/batch")
+async def record_interactions_batch(
+    batch: PaperInteractionBatch,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Record many interactions at once (e.g. swipes queued on the client)"""
+    for interaction in batch.interactions:
+        interaction_buffer.add(current_user.id, interaction.arxiv_id, interaction.interaction_type)
+        deck_manager.remove(current_user.id, interaction.arxiv_id)
+
+    return {
+        "message": "Interactions recorded successfully",
+        "recorded": len(batch.interactions)
+    }
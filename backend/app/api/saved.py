@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
-from typing import List
-from sqlalchemy.orm import Session
-import json
-from ..database import get_db
-from ..models import User, SavedPaper, Tag, saved_paper_tags
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from typing import Iterator, List, Optional, Tuple
+import hashlib
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from ..config import settings
+from ..database import get_db, SessionLocal
+from ..models import User, Paper, SavedPaper, Tag, saved_paper_tags
 from ..schemas import (
     SavedPaperCreate,
     SavedPaperUpdate,
@@ -11,32 +16,67 @@ from ..schemas import (
     TagCreate,
     TagResponse
 )
-from ..core import get_current_active_user
-from ..utils.export import export_to_bibtex, export_to_csv, export_to_text
+from ..core import (
+    get_current_active_user,
+    get_or_fetch_papers,
+    strip_version,
+    update_profiles,
+    record_save,
+    adjust_user_counts,
+    bump_library_version,
+    export_cache,
+    fan_out_save,
+    remove_save,
+    encode_cursor,
+    decode_cursor,
+    before_cursor
+)
+from ..utils.export import export_to_bibtex, export_to_csv, export_to_text, encode_chunks
 
 router = APIRouter(prefix="/saved", tags=["saved-papers"])
 
 
 @router.get("/", response_model=List[SavedPaperResponse])
 async def get_saved_papers(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Number of papers to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all saved papers for the current user"""
-    saved_papers = db.query(SavedPaper).filter(
+    """
+    Get the current user's saved papers, newest first. When there are more
+    papers, the X-Next-Cursor response header holds the cursor for the
+    next page.
+    """
+    query = select(SavedPaper).options(selectinload(SavedPaper.tags)).where(
         SavedPaper.user_id == current_user.id
-    ).order_by(SavedPaper.saved_at.desc()).all()
+    )
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(before_cursor(SavedPaper.saved_at, SavedPaper.id, position))
+
+    saved_papers = (await db.scalars(query.order_by(
+        SavedPaper.saved_at.desc(),
+        SavedPaper.id.desc()
+    ).limit(limit + 1))).all()
+
+    if len(saved_papers) > limit:
+        saved_papers = saved_papers[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(saved_papers[-1].saved_at, saved_papers[-1].id)
 
     # Format response with tags
-    response = []
+    response_papers = []
     for paper in saved_papers:
         paper_dict = {
             "id": paper.id,
             "arxiv_id": paper.arxiv_id,
             "title": paper.title,
-            "authors": json.loads(paper.authors),
+            "authors": paper.authors,
             "abstract": paper.abstract,
-            "categories": json.loads(paper.categories),
+            "categories": paper.categories,
             "published_date": paper.published_date,
             "pdf_url": paper.pdf_url,
             "source_url": paper.source_url,
@@ -46,23 +86,23 @@ async def get_saved_papers(
             "saved_at": paper.saved_at,
             "updated_at": paper.updated_at
         }
-        response.append(paper_dict)
+        response_papers.append(paper_dict)
 
-    return response
+    return response_papers
 
 
 @router.post("/", response_model=SavedPaperResponse, status_code=status.HTTP_201_CREATED)
 async def save_paper(
     paper_data: SavedPaperCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Save a paper to user's collection"""
     # Check if paper already saved
-    existing = db.query(SavedPaper).filter(
+    existing = await db.scalar(select(SavedPaper.id).join(SavedPaper.paper).where(
         SavedPaper.user_id == current_user.id,
-        SavedPaper.arxiv_id == paper_data.arxiv_id
-    ).first()
+        Paper.base_id == strip_version(paper_data.arxiv_id)
+    ))
 
     if existing:
         raise HTTPException(
@@ -70,32 +110,39 @@ async def save_paper(
             detail="Paper already saved"
         )
 
-    # Create new saved paper
+    # Paper metadata is shared and comes from arXiv; only the user's
+    # additions go on the saved paper
+    papers = await get_or_fetch_papers(db, [paper_data.arxiv_id])
+    if paper_data.arxiv_id not in papers:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Paper not found on arXiv"
+        )
+    paper = papers[paper_data.arxiv_id]
     new_paper = SavedPaper(
         user_id=current_user.id,
-        arxiv_id=paper_data.arxiv_id,
-        title=paper_data.title,
-        authors=json.dumps(paper_data.authors),
-        abstract=paper_data.abstract,
-        categories=json.dumps(paper_data.categories),
-        published_date=paper_data.published_date,
-        pdf_url=paper_data.pdf_url,
-        source_url=paper_data.source_url,
+        paper=paper,
         notes=paper_data.notes,
         is_public=1 if paper_data.is_public else 0
     )
 
     db.add(new_paper)
-    db.commit()
-    db.refresh(new_paper)
-
-    return {
+    await db.run_sync(adjust_user_counts, current_user.id, saved_papers_count=1, library_version=1)
+    if new_paper.is_public:
+        await db.run_sync(record_save, paper.id)
+        await db.flush()
+        await db.run_sync(fan_out_save, new_paper, current_user)
+    await db.commit()
+    await db.refresh(new_paper)
+
+    # Built before the profile update, whose rollback would expire new_paper
+    saved = {
         "id": new_paper.id,
         "arxiv_id": new_paper.arxiv_id,
         "title": new_paper.title,
-        "authors": json.loads(new_paper.authors),
+        "authors": new_paper.authors,
         "abstract": new_paper.abstract,
-        "categories": json.loads(new_paper.categories),
+        "categories": new_paper.categories,
         "published_date": new_paper.published_date,
         "pdf_url": new_paper.pdf_url,
         "source_url": new_paper.source_url,
@@ -106,19 +153,28 @@ async def save_paper(
         "updated_at": new_paper.updated_at
     }
 
+    # Fold the save into the user's interest profile
+    try:
+        await db.run_sync(update_profiles, [(current_user.id, saved, "save", saved["saved_at"])])
+    except Exception as e:
+        await db.rollback()
+        print(f"Error updating interest profile: {e}")
+
+    return saved
+
 
 @router.patch("/{paper_id}", response_model=SavedPaperResponse)
 async def update_saved_paper(
     paper_id: int,
     paper_update: SavedPaperUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update notes, tags, or privacy for a saved paper"""
-    paper = db.query(SavedPaper).filter(
+    paper = await db.scalar(select(SavedPaper).options(selectinload(SavedPaper.tags)).where(
         SavedPaper.id == paper_id,
         SavedPaper.user_id == current_user.id
-    ).first()
+    ))
 
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
@@ -128,7 +184,15 @@ async def update_saved_paper(
         paper.notes = paper_update.notes
 
     if paper_update.is_public is not None:
-        paper.is_public = 1 if paper_update.is_public else 0
+        is_public = 1 if paper_update.is_public else 0
+        if is_public != paper.is_public:
+            # Only public saves count towards trending and show up in feeds
+            await db.run_sync(record_save, paper.paper_id, paper.saved_at, 1 if is_public else -1)
+            if is_public:
+                await db.run_sync(fan_out_save, paper, current_user)
+            else:
+                await db.run_sync(remove_save, paper.id)
+        paper.is_public = is_public
 
     # Update tags
     if paper_update.tags is not None:
@@ -138,28 +202,29 @@ async def update_saved_paper(
         # Add new tags
         for tag_name in paper_update.tags:
             # Find or create tag
-            tag = db.query(Tag).filter(
+            tag = await db.scalar(select(Tag).where(
                 Tag.user_id == current_user.id,
                 Tag.name == tag_name
-            ).first()
+            ))
 
             if not tag:
                 tag = Tag(user_id=current_user.id, name=tag_name)
                 db.add(tag)
-                db.flush()
+                await db.flush()
 
             paper.tags.append(tag)
 
-    db.commit()
-    db.refresh(paper)
+    await db.run_sync(bump_library_version, current_user.id)
+    await db.commit()
+    await db.refresh(paper, ["updated_at", "tags"])
 
     return {
         "id": paper.id,
         "arxiv_id": paper.arxiv_id,
         "title": paper.title,
-        "authors": json.loads(paper.authors),
+        "authors": paper.authors,
         "abstract": paper.abstract,
-        "categories": json.loads(paper.categories),
+        "categories": paper.categories,
         "published_date": paper.published_date,
         "pdf_url": paper.pdf_url,
         "source_url": paper.source_url,
@@ -175,19 +240,23 @@ async def update_saved_paper(
 async def delete_saved_paper(
     paper_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove a paper from saved collection"""
-    paper = db.query(SavedPaper).filter(
+    paper = await db.scalar(select(SavedPaper).where(
         SavedPaper.id == paper_id,
         SavedPaper.user_id == current_user.id
-    ).first()
+    ))
 
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
 
-    db.delete(paper)
-    db.commit()
+    if paper.is_public:
+        await db.run_sync(record_save, paper.paper_id, paper.saved_at, -1)
+        await db.run_sync(remove_save, paper.id)
+    await db.run_sync(adjust_user_counts, current_user.id, saved_papers_count=-1, library_version=1)
+    await db.delete(paper)
+    await db.commit()
 
     return {"message": "Paper removed successfully"}
 
@@ -195,10 +264,10 @@ async def delete_saved_paper(
 @router.get("/tags", response_model=List[TagResponse])
 async def get_tags(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all tags for the current user"""
-    tags = db.query(Tag).filter(Tag.user_id == current_user.id).all()
+    tags = (await db.scalars(select(Tag).where(Tag.user_id == current_user.id))).all()
     return tags
 
 
@@ -206,14 +275,14 @@ async def get_tags(
 async def create_tag(
     tag_data: TagCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new tag"""
     # Check if tag already exists
-    existing = db.query(Tag).filter(
+    existing = await db.scalar(select(Tag).where(
         Tag.user_id == current_user.id,
         Tag.name == tag_data.name
-    ).first()
+    ))
 
     if existing:
         raise HTTPException(
@@ -228,8 +297,9 @@ async def create_tag(
     )
 
     db.add(new_tag)
-    db.commit()
-    db.refresh(new_tag)
+    await db.run_sync(bump_library_version, current_user.id)
+    await db.commit()
+    await db.refresh(new_tag)
 
     return new_tag
 
@@ -238,70 +308,164 @@ async def create_tag(
 async def delete_tag(
     tag_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a tag"""
-    tag = db.query(Tag).filter(
+    tag = await db.scalar(select(Tag).where(
         Tag.id == tag_id,
         Tag.user_id == current_user.id
-    ).first()
+    ))
 
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    db.delete(tag)
-    db.commit()
+    await db.delete(tag)
+    await db.run_sync(bump_library_version, current_user.id)
+    await db.commit()
 
     return {"message": "Tag deleted successfully"}
 
 
+# Export renderers: (render, media type, filename)
+_EXPORT_FORMATS = {
+    "bibtex": (export_to_bibtex, "application/x-bibtex", "papers.bib"),
+    "csv": (export_to_csv, "text/csv", "papers.csv"),
+    "text": (export_to_text, "text/plain", "papers.txt")
+}
+
+
+def _export_query(user_id: int, tag: Optional[str]):
+    query = select(SavedPaper).where(SavedPaper.user_id == user_id)
+
+    # Filter by tag if provided
+    if tag:
+        query = query.join(SavedPaper.tags).where(Tag.name == tag)
+
+    return query.order_by(SavedPaper.saved_at.desc(), SavedPaper.id.desc())
+
+
+def _render_export(user_id: int, tag: Optional[str], render, compress: bool) -> Iterator[bytes]:
+    """
+    Render an export from rows read in batches. Runs while the response is
+    being sent, after the request's session is closed, so it uses its own.
+    """
+    db = SessionLocal()
+    try:
+        papers = db.scalars(_export_query(user_id, tag).execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        yield from encode_chunks(render(papers), compress=compress)
+    finally:
+        db.close()
+
+
+async def _stream_export(cache_key: Tuple, user_id: int, tag: Optional[str], render, compress: bool):
+    """Stream a rendered export and keep a copy in the export cache if it's small enough"""
+    chunks = []
+    size = 0
+    async for chunk in iterate_in_threadpool(_render_export(user_id, tag, render, compress)):
+        if chunks is not None:
+            size += len(chunk)
+            if size <= settings.EXPORT_CACHE_MAX_ITEM_BYTES:
+                chunks.append(chunk)
+            else:
+                chunks = None
+        yield chunk
+
+    if chunks is not None:
+        export_cache.set(cache_key, b"".join(chunks))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether Accept-Encoding allows gzip, honouring q-values (q=0 means not acceptable)"""
+    qualities = {}
+    for item in (accept_encoding or "").lower().split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    if "gzip" in qualities:
+        return qualities["gzip"] > 0
+    return qualities.get("*", 0) > 0
+
+
 @router.get("/export")
 async def export_papers(
+    request: Request,
     format: str = Query(..., description="Export format: bibtex, csv, or text"),
     tag: str = Query(None, description="Filter by tag name"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Export saved papers in various formats (BibTeX, CSV, plain text)"""
-    # Get saved papers
-    query = db.query(SavedPaper).filter(SavedPaper.user_id == current_user.id)
+    """
+    Export saved papers in various formats (BibTeX, CSV, plain text). The
+    file is streamed as it is rendered, gzip-compressed when the client
+    accepts it.
+
+    Exports are versioned by the user's library version: the ETag changes
+    whenever a paper or tag does, a matching If-None-Match gets a 304
+    without reading the library, and recent exports are served from cache.
+    """
+    export_format = _EXPORT_FORMATS.get(format.lower())
+    if export_format is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid format. Use 'bibtex', 'csv', or 'text'"
+        )
+    render, media_type, filename = export_format
 
-    # Filter by tag if provided
-    if tag:
-        query = query.join(SavedPaper.tags).filter(Tag.name == tag)
+    # Not part of the cached auth fields, and must never be stale
+    library_version = await db.scalar(select(User.library_version).where(User.id == current_user.id))
+
+    compress = _accepts_gzip(request.headers.get("accept-encoding"))
+    tag_hash = hashlib.sha256(tag.encode()).hexdigest()[:16] if tag else "all"
+    etag = (
+        f'"{current_user.id}-{library_version}-{format.lower()}-{tag_hash}'
+        f'{"-gzip" if compress else ""}"'
+    )
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding"
+    }
 
-    papers = query.order_by(SavedPaper.saved_at.desc()).all()
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    if not papers:
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    cache_key = (current_user.id, format.lower(), tag, library_version, compress)
+    content, _ = export_cache.get(cache_key)
+    if content is not None:
+        return Response(content=content, media_type=media_type, headers=headers)
+
+    if not await db.scalar(select(_export_query(current_user.id, tag).exists())):
         raise HTTPException(
             status_code=404,
             detail="No papers found to export"
         )
 
-    # Generate export content based on format
-    if format.lower() == "bibtex":
-        content = export_to_bibtex(papers)
-        media_type = "application/x-bibtex"
-        filename = "papers.bib"
-    elif format.lower() == "csv":
-        content = export_to_csv(papers)
-        media_type = "text/csv"
-        filename = "papers.csv"
-    elif format.lower() == "text":
-        content = export_to_text(papers)
-        media_type = "text/plain"
-        filename = "papers.txt"
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid format. Use 'bibtex', 'csv', or 'text'"
-        )
-
     # Return file download response
-    return Response(
-        content=content,
+    return StreamingResponse(
+        _stream_export(cache_key, current_user.id, tag, render, compress),
         media_type=media_type,
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
+        headers=headers
     )
@@ -1,11 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-import json
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from ..database import get_db
-from ..models import User, SavedPaper, Follow
+from ..models import User, Follow
 from ..schemas import (
     UserProfile,
     FollowersResponse,
@@ -13,7 +12,16 @@ from ..schemas import (
     TrendingPaper,
     FeedItem
 )
-from ..core import get_current_active_user, get_optional_user
+from ..core import (
+    get_current_active_user,
+    get_optional_user,
+    trending_leaderboard,
+    adjust_user_counts,
+    add_follow,
+    remove_follow,
+    read_feed,
+    decode_cursor
+)
 
 router = APIRouter(prefix="/social", tags=["social"])
 
@@ -22,43 +30,30 @@ router = APIRouter(prefix="/social", tags=["social"])
 async def get_user_profile(
     user_id: int,
     current_user: User = Depends(get_optional_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user profile"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Get counts
-    followers_count = db.query(Follow).filter(Follow.following_id == user_id).count()
-    following_count = db.query(Follow).filter(Follow.follower_id == user_id).count()
-    saved_papers_count = db.query(SavedPaper).filter(SavedPaper.user_id == user_id).count()
-
     # Check if current user is following this user
     is_following = False
     if current_user:
-        is_following = db.query(Follow).filter(
+        is_following = await db.scalar(select(Follow.id).where(
             Follow.follower_id == current_user.id,
             Follow.following_id == user_id
-        ).first() is not None
-
-    # Parse research interests
-    research_interests = None
-    if user.research_interests:
-        try:
-            research_interests = json.loads(user.research_interests)
-        except:
-            research_interests = []
+        )) is not None
 
     return {
         "id": user.id,
         "email": user.email,
         "full_name": user.full_name,
         "bio": user.bio,
-        "research_interests": research_interests,
-        "followers_count": followers_count,
-        "following_count": following_count,
-        "saved_papers_count": saved_papers_count,
+        "research_interests": user.research_interests,
+        "followers_count": user.followers_count,
+        "following_count": user.following_count,
+        "saved_papers_count": user.saved_papers_count,
         "is_following": is_following
     }
 
@@ -67,7 +62,7 @@ async def get_user_profile(
 async def follow_user(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Follow a user"""
     # Can't follow yourself
@@ -78,15 +73,15 @@ async def follow_user(
         )
 
     # Check if user exists
-    target_user = db.query(User).filter(User.id == user_id).first()
+    target_user = await db.scalar(select(User).where(User.id == user_id))
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check if already following
-    existing = db.query(Follow).filter(
+    existing = await db.scalar(select(Follow).where(
         Follow.follower_id == current_user.id,
         Follow.following_id == user_id
-    ).first()
+    ))
 
     if existing:
         raise HTTPException(
@@ -100,7 +95,10 @@ async def follow_user(
         following_id=user_id
     )
     db.add(new_follow)
-    db.commit()
+    await db.run_sync(add_follow, current_user.id, target_user)
+    await db.run_sync(adjust_user_counts, current_user.id, following_count=1)
+    await db.run_sync(adjust_user_counts, user_id, followers_count=1)
+    await db.commit()
 
     return {"message": "Successfully followed user"}
 
@@ -109,19 +107,22 @@ async def follow_user(
 async def unfollow_user(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Unfollow a user"""
-    follow = db.query(Follow).filter(
+    follow = await db.scalar(select(Follow).where(
         Follow.follower_id == current_user.id,
         Follow.following_id == user_id
-    ).first()
+    ))
 
     if not follow:
         raise HTTPException(status_code=404, detail="Not following this user")
 
-    db.delete(follow)
-    db.commit()
+    await db.delete(follow)
+    await db.run_sync(remove_follow, current_user.id, user_id)
+    await db.run_sync(adjust_user_counts, current_user.id, following_count=-1)
+    await db.run_sync(adjust_user_counts, user_id, followers_count=-1)
+    await db.commit()
 
     return {"message": "Successfully unfollowed user"}
 
@@ -129,10 +130,12 @@ async def unfollow_user(
 @router.get("/followers", response_model=FollowersResponse)
 async def get_followers(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get list of followers"""
-    follows = db.query(Follow).filter(Follow.following_id == current_user.id).all()
+    follows = (await db.scalars(select(Follow).options(joinedload(Follow.follower)).where(
+        Follow.following_id == current_user.id
+    ))).all()
 
     followers = []
     for follow in follows:
@@ -142,10 +145,10 @@ async def get_followers(
             "email": user.email,
             "full_name": user.full_name,
             "bio": user.bio,
-            "research_interests": json.loads(user.research_interests) if user.research_interests else [],
-            "followers_count": db.query(Follow).filter(Follow.following_id == user.id).count(),
-            "following_count": db.query(Follow).filter(Follow.follower_id == user.id).count(),
-            "saved_papers_count": db.query(SavedPaper).filter(SavedPaper.user_id == user.id).count(),
+            "research_interests": user.research_interests or [],
+            "followers_count": user.followers_count,
+            "following_count": user.following_count,
+            "saved_papers_count": user.saved_papers_count,
             "is_following": True
         })
 
@@ -155,10 +158,12 @@ async def get_followers(
 @router.get("/following", response_model=FollowingResponse)
 async def get_following(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get list of users being followed"""
-    follows = db.query(Follow).filter(Follow.follower_id == current_user.id).all()
+    follows = (await db.scalars(select(Follow).options(joinedload(Follow.following)).where(
+        Follow.follower_id == current_user.id
+    ))).all()
 
     following = []
     for follow in follows:
@@ -168,10 +173,10 @@ async def get_following(
             "email": user.email,
             "full_name": user.full_name,
             "bio": user.bio,
-            "research_interests": json.loads(user.research_interests) if user.research_interests else [],
-            "followers_count": db.query(Follow).filter(Follow.following_id == user.id).count(),
-            "following_count": db.query(Follow).filter(Follow.follower_id == user.id).count(),
-            "saved_papers_count": db.query(SavedPaper).filter(SavedPaper.user_id == user.id).count(),
+            "research_interests": user.research_interests or [],
+            "followers_count": user.followers_count,
+            "following_count": user.following_count,
+            "saved_papers_count": user.saved_papers_count,
             "is_following": True
         })
 
@@ -182,108 +187,67 @@ async def get_following(
 async def get_trending_papers(
     days: int = Query(7, ge=1, le=30, description="Number of days to look back"),
     limit: int = Query(10, ge=1, le=50, description="Number of papers to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get trending papers based on saves"""
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
-
-    # Query for most saved papers
-    trending = db.query(
-        SavedPaper.arxiv_id,
-        SavedPaper.title,
-        SavedPaper.authors,
-        SavedPaper.abstract,
-        SavedPaper.categories,
-        SavedPaper.published_date,
-        SavedPaper.pdf_url,
-        SavedPaper.source_url,
-        func.count(SavedPaper.arxiv_id).label('total_saves'),
-        func.sum(func.case([(SavedPaper.saved_at >= cutoff_date, 1)], else_=0)).label('recent_saves')
-    ).filter(
-        SavedPaper.is_public == 1
-    ).group_by(
-        SavedPaper.arxiv_id,
-        SavedPaper.title,
-        SavedPaper.authors,
-        SavedPaper.abstract,
-        SavedPaper.categories,
-        SavedPaper.published_date,
-        SavedPaper.pdf_url,
-        SavedPaper.source_url
-    ).order_by(
-        desc('recent_saves')
-    ).limit(limit).all()
-
-    result = []
-    for paper in trending:
-        result.append({
-            "arxiv_id": paper.arxiv_id,
-            "title": paper.title,
-            "authors": json.loads(paper.authors),
-            "abstract": paper.abstract,
-            "categories": json.loads(paper.categories),
-            "published_date": paper.published_date,
-            "pdf_url": paper.pdf_url,
-            "source_url": paper.source_url,
-            "save_count": paper.total_saves,
-            "recent_saves": paper.recent_saves
-        })
-
-    return result
+    """
+    Get trending papers based on public saves. Served from a leaderboard
+    that is refreshed in the background, so it may lag by up to
+    TRENDING_REFRESH_SECONDS.
+    """
+    return await db.run_sync(trending_leaderboard.get, days, limit)
 
 
 @router.get("/feed")
 async def get_feed(
+    response: Response,
     limit: int = Query(20, ge=1, le=100, description="Number of items to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get activity feed from followed users"""
-    # Get followed user IDs
-    following_ids = db.query(Follow.following_id).filter(
-        Follow.follower_id == current_user.id
-    ).all()
-    following_ids = [uid[0] for uid in following_ids]
-
-    if not following_ids:
-        return []
-
-    # Get recent saves from followed users
-    recent_saves = db.query(SavedPaper).filter(
-        SavedPaper.user_id.in_(following_ids),
-        SavedPaper.is_public == 1
-    ).order_by(
-        SavedPaper.saved_at.desc()
-    ).limit(limit).all()
+    """
+    Get activity feed from followed users, newest first. When there are
+    more items, the X-Next-Cursor response header holds the cursor for
+    the next page.
+    """
+    position = None
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    page, authors, next_cursor = await db.run_sync(read_feed, current_user.id, limit, position)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     feed = []
-    for save in recent_saves:
-        user = db.query(User).filter(User.id == save.user_id).first()
+    for created_at, save in page:
+        user = authors[save.user_id]
         feed.append({
             "user": {
                 "id": user.id,
                 "email": user.email,
                 "full_name": user.full_name,
                 "bio": user.bio,
-                "research_interests": json.loads(user.research_interests) if user.research_interests else [],
-                "followers_count": 0,
-                "following_count": 0,
-                "saved_papers_count": 0,
+                "research_interests": user.research_interests or [],
+                "followers_count": user.followers_count,
+                "following_count": user.following_count,
+                "saved_papers_count": user.saved_papers_count,
                 "is_following": True
             },
             "paper": {
                 "id": save.id,
                 "arxiv_id": save.arxiv_id,
                 "title": save.title,
-                "authors": json.loads(save.authors),
+                "authors": save.authors,
                 "abstract": save.abstract,
-                "categories": json.loads(save.categories),
+                "categories": save.categories,
                 "published_date": save.published_date,
                 "pdf_url": save.pdf_url,
                 "source_url": save.source_url
             },
             "action": "saved",
-            "created_at": save.saved_at
+            "created_at": created_at
         })
 
     return feed
@@ -12,12 +12,83 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Password hashing (bcrypt runs on a worker pool, off the event loop)
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are upgraded on the next login after a change
+    PASSWORD_HASH_WORKERS: int = 0  # 0: one per CPU core
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Waiting hashes beyond this are refused with a 503
+
+    # Authenticated user cache (skips the users lookup on most requests)
+    AUTH_USER_CACHE_TTL: int = 30  # Seconds a deactivation may go unnoticed if not invalidated
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USER_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+
     # CORS - Comma-separated string, parsed in main.py
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000,https://riddhigangbhoj.github.io,https://paperswipe.riddhigangbhoj.com,*"
 
     # arXiv API
     ARXIV_API_BASE: str = "https://export.arxiv.org/api/query"
-    ARXIV_RATE_LIMIT_DELAY: int = 3
+    ARXIV_RATE_LIMIT_DELAY: int = 3  # Minimum seconds between upstream calls
+    ARXIV_RATE_LIMIT_BURST: int = 1
+    ARXIV_ID_LIST_CHUNK: int = 100  # Max ids per id_list request
+    ARXIV_FETCH_BUDGET: int = 3  # Max upstream pages fetched to fill one date-filtered page
+
+    # arXiv HTTP connection pool (one shared client per worker)
+    ARXIV_HTTP_TIMEOUT: float = 30.0
+    ARXIV_HTTP2: bool = False  # Requires the optional `h2` package
+    ARXIV_MAX_CONNECTIONS: int = 10
+    ARXIV_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    ARXIV_KEEPALIVE_EXPIRY: float = 60.0
+
+    # arXiv search result cache
+    ARXIV_CACHE_TTL: int = 300  # Seconds an entry is fresh
+    ARXIV_CACHE_STALE_TTL: int = 3600  # Seconds a stale entry may be served while refreshing
+    ARXIV_CACHE_EMPTY_TTL: int = 60
+    ARXIV_CACHE_MAX_ENTRIES: int = 1000
+    ARXIV_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Local paper catalog and background harvester
+    CATALOG_SEARCH_ENABLED: bool = True
+    HARVEST_ENABLED: bool = False
+    HARVEST_CATEGORIES: str = "cs.AI,cs.LG,cs.CL,cs.CV"
+    HARVEST_INTERVAL_SECONDS: int = 3600
+    HARVEST_PAGE_SIZE: int = 100
+    HARVEST_MAX_PAGES: int = 10
+
+    # Per-user prefetched swipe deck
+    DECK_TARGET_SIZE: int = 60
+    DECK_LOW_WATER: int = 20  # Refill in the background below this many papers
+    DECK_PAGE_SIZE: int = 50
+    DECK_MAX_FETCHES: int = 5  # Upstream pages per refill
+    DECK_MAX_USERS: int = 10000
+
+    # Write-behind buffer for paper interactions
+    INTERACTION_FLUSH_SIZE: int = 500
+    INTERACTION_FLUSH_INTERVAL: float = 1.0  # Seconds
+    INTERACTION_MAX_ATTEMPTS: int = 10  # Failed flushes before a row is dropped
+
+    # Content-based reranking of search results
+    RANKING_ENABLED: bool = True
+    RANKING_DIM: int = 4096  # Hashed feature dimensions
+    RANKING_WEIGHT: float = 0.7  # Profile similarity vs. original rank
+    RANKING_PROFILE_SIZE: int = 200  # Recent signals replayed when (re)building a profile
+    RANKING_HALF_LIFE_DAYS: float = 30.0  # Signals lose half their weight after this long
+    RANKING_ROW_CACHE_SIZE: int = 20000  # Cached per-paper term vectors
+
+    # Trending leaderboard
+    TRENDING_MAX_DAYS: int = 30  # Longest window; older daily buckets are pruned
+    TRENDING_TOP_N: int = 50  # Papers cached per window
+    TRENDING_REFRESH_SECONDS: int = 60
+
+    # Activity feed
+    FEED_FANOUT_MAX_FOLLOWERS: int = 10000  # Above this, saves are read from the author at feed time
+    FEED_BACKFILL_ITEMS: int = 50  # Recent saves copied into a timeline on follow
+
+    # Saved paper export
+    EXPORT_BATCH_SIZE: int = 500  # Rows read per round trip while streaming
+    EXPORT_CACHE_TTL: int = 3600
+    EXPORT_CACHE_MAX_ENTRIES: int = 256
+    EXPORT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EXPORT_CACHE_MAX_ITEM_BYTES: int = 8 * 1024 * 1024  # Larger exports are streamed without caching
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,94 @@
-from .security import verify_password, get_password_hash, create_access_token, create_refresh_token, verify_token
-from .dependencies import get_current_user, get_current_active_user, get_optional_user
-from .arxiv_client import arxiv_client
+from .security import (
+    verify_password,
+    get_password_hash,
+    password_needs_rehash,
+    create_access_token,
+    create_refresh_token,
+    verify_token
+)
+from .password_hasher import PasswordHasher, PasswordHasherBusy, password_hasher
+from .dependencies import get_current_user, get_current_active_user, get_optional_user, invalidate_auth_user
+from .arxiv_client import arxiv_client, strip_version
+from .catalog import (
+    search_catalog,
+    find_papers,
+    get_or_fetch_papers,
+    get_catalog_paper,
+    get_catalog_papers,
+    get_or_create_paper,
+    upsert_papers,
+    backfill_harvested,
+    backfill_base_ids,
+    migrate_saved_papers
+)
+from .harvester import arxiv_harvester
+from .search_index import init_search_index
+from .interactions import get_seen_ids, interaction_buffer
+from .deck import deck_manager
+from .ranking import rerank, load_profile, update_profiles, rebuild_profile
+from .trending import record_save, rebuild_save_buckets, trending_leaderboard
+from .counters import USER_COUNT_COLUMNS, adjust_user_counts, bump_library_version, reconcile_user_counts
+from .feed import (
+    fan_out_save, remove_save, add_follow, remove_follow, read_feed, rebuild_feed,
+    encode_cursor, decode_cursor, before_cursor
+)
+from .cache import TTLCache, auth_user_cache, export_cache
+from .rate_limiter import RateLimiter, arxiv_rate_limiter
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "password_needs_rehash",
+    "PasswordHasher",
+    "PasswordHasherBusy",
+    "password_hasher",
     "create_access_token",
     "create_refresh_token",
     "verify_token",
     "get_current_user",
     "get_current_active_user",
     "get_optional_user",
-    "arxiv_client"
+    "invalidate_auth_user",
+    "arxiv_client",
+    "strip_version",
+    "search_catalog",
+    "find_papers",
+    "get_or_fetch_papers",
+    "get_catalog_paper",
+    "get_catalog_papers",
+    "get_or_create_paper",
+    "upsert_papers",
+    "backfill_harvested",
+    "backfill_base_ids",
+    "migrate_saved_papers",
+    "arxiv_harvester",
+    "init_search_index",
+    "get_seen_ids",
+    "interaction_buffer",
+    "deck_manager",
+    "rerank",
+    "load_profile",
+    "update_profiles",
+    "rebuild_profile",
+    "record_save",
+    "rebuild_save_buckets",
+    "trending_leaderboard",
+    "USER_COUNT_COLUMNS",
+    "adjust_user_counts",
+    "bump_library_version",
+    "reconcile_user_counts",
+    "fan_out_save",
+    "remove_save",
+    "add_follow",
+    "remove_follow",
+    "read_feed",
+    "rebuild_feed",
+    "encode_cursor",
+    "decode_cursor",
+    "before_cursor",
+    "TTLCache",
+    "auth_user_cache",
+    "export_cache",
+    "RateLimiter",
+    "arxiv_rate_limiter"
 ]
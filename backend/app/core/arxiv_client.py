@@ -1,9 +1,53 @@
 import httpx
-import feedparser
 import asyncio
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from ..config import settings
+from ..utils import parse_day
+from .rate_limiter import arxiv_rate_limiter
+from .cache import TTLCache
+from .atom_parser import iter_papers, aiter_papers
+
+# Popular CS categories used when a search has no query or category filter
+DEFAULT_CATEGORIES = ["cs.AI", "cs.LG", "cs.CL", "cs.CV"]
+
+
+def parse_feed(feed_text: str) -> List[Dict]:
+    """Parse a complete arXiv Atom response into paper dicts"""
+    return list(iter_papers([feed_text.encode('utf-8')]))
+
+
+def _submitted_date_clause(from_date: Optional[datetime], to_date: Optional[datetime]) -> Optional[str]:
+    """arXiv query clause restricting results to an inclusive date range"""
+    if from_date is None and to_date is None:
+        return None
+    lower = from_date.strftime("%Y%m%d0000") if from_date else "199101010000"
+    upper = to_date.strftime("%Y%m%d2359") if to_date else "999912312359"
+    return f"submittedDate:[{lower} TO {upper}]"
+
+
+def _in_date_range(published_date: str, from_date: Optional[datetime], to_date: Optional[datetime]) -> bool:
+    """Check a published date against an inclusive date range"""
+    try:
+        pub_date = datetime.strptime(published_date[:10], "%Y-%m-%d")
+    except ValueError:
+        return True
+    if from_date and pub_date < from_date:
+        return False
+    if to_date and pub_date > to_date:
+        return False
+    return True
+
+
+def strip_version(arxiv_id: str) -> str:
+    """2401.12345v2 -> 2401.12345"""
+    base, sep, version = arxiv_id.rpartition("v")
+    return base if sep and version.isdigit() else arxiv_id
+
+
+def _copy_papers(papers: List[Dict]) -> List[Dict]:
+    """Give each caller its own paper dicts so cached results stay intact"""
+    return [dict(paper) for paper in papers]
 
 
 class ArxivClient:
@@ -11,7 +55,100 @@ class ArxivClient:
 
     def __init__(self):
         self.base_url = settings.ARXIV_API_BASE
-        self.rate_limit_delay = settings.ARXIV_RATE_LIMIT_DELAY
+        self.rate_limiter = arxiv_rate_limiter
+        self._client: Optional[httpx.AsyncClient] = None
+        self._requests_sent = 0
+        self._clients_opened = 0
+        self.cache = TTLCache(
+            max_entries=settings.ARXIV_CACHE_MAX_ENTRIES,
+            max_bytes=settings.ARXIV_CACHE_MAX_BYTES,
+            ttl=settings.ARXIV_CACHE_TTL,
+            stale_ttl=settings.ARXIV_CACHE_STALE_TTL
+        )
+        self._refreshing: Dict[Tuple, asyncio.Task] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._coalesced = 0
+
+    async def start(self):
+        """Open the shared HTTP client (called on app startup)"""
+        if self._client is not None and not self._client.is_closed:
+            return
+
+        http2 = settings.ARXIV_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("ARXIV_HTTP2 is enabled but 'h2' is not installed, falling back to HTTP/1.1")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            timeout=settings.ARXIV_HTTP_TIMEOUT,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.ARXIV_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ARXIV_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ARXIV_KEEPALIVE_EXPIRY
+            )
+        )
+        self._clients_opened += 1
+
+    async def close(self):
+        """Close the shared HTTP client (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared client, opening it lazily if startup didn't run"""
+        if self._client is None or self._client.is_closed:
+            await self.start()
+        return self._client
+
+    def pool_stats(self) -> Dict:
+        """Connection pool statistics for the shared HTTP client"""
+        stats = {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": settings.ARXIV_HTTP2,
+            "max_connections": settings.ARXIV_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.ARXIV_MAX_KEEPALIVE_CONNECTIONS,
+            "clients_opened": self._clients_opened,
+            "requests_sent": self._requests_sent,
+            "connections": 0,
+            "idle_connections": 0
+        }
+
+        # httpx doesn't expose pool state publicly, so read it off the transport
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+
+        return stats
+
+    @staticmethod
+    def _cache_key(
+        query: Optional[str],
+        categories: Optional[List[str]],
+        max_results: int,
+        start: int,
+        date_from: Optional[str],
+        date_to: Optional[str],
+        sort_by: str
+    ) -> Tuple:
+        """Normalized key identifying a search request"""
+        normalized_query = " ".join(query.lower().split()) if query else None
+        normalized_categories = tuple(sorted(set(categories))) if categories else ()
+        return (
+            normalized_query,
+            normalized_categories,
+            sort_by,
+            start,
+            max_results,
+            date_from,
+            date_to
+        )
 
     async def search_papers(
         self,
@@ -25,7 +162,97 @@ class ArxivClient:
     ) -> List[Dict]:
         """
         Search papers on arXiv with filters
+
+        Results are served from the in-process cache when possible. Stale
+        entries are returned immediately and refreshed in the background.
         """
+        args = (query, categories, max_results, start, date_from, date_to, sort_by)
+        key = self._cache_key(*args)
+
+        cached, is_stale = self.cache.get(key)
+        if cached is not None:
+            if is_stale:
+                self._schedule_refresh(key, args)
+            return _copy_papers(cached)
+
+        try:
+            papers = await self._fetch_and_cache(key, args)
+        except Exception as e:
+            print(f"Error fetching papers from arXiv: {e}")
+            return []
+
+        return _copy_papers(papers)
+
+    async def _fetch_and_cache(self, key: Tuple, args: Tuple) -> List[Dict]:
+        """
+        Fetch a page upstream, sharing one request between concurrent
+        callers asking for the same normalized key (single-flight)
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_into_cache(key, args))
+            self._inflight[key] = task
+
+            def release(done: asyncio.Future):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(release)
+        else:
+            self._coalesced += 1
+
+        # Shield so one caller going away doesn't cancel everyone else's fetch
+        return await asyncio.shield(task)
+
+    async def _fetch_into_cache(self, key: Tuple, args: Tuple) -> List[Dict]:
+        papers = await self._fetch_papers(*args)
+        # Empty pages are usually transient (new listings not indexed yet)
+        ttl = settings.ARXIV_CACHE_EMPTY_TTL if not papers else None
+        self.cache.set(key, papers, ttl=ttl)
+        return papers
+
+    def _schedule_refresh(self, key: Tuple, args: Tuple):
+        """Revalidate a stale cache entry without blocking the caller"""
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._fetch_and_cache(key, args)
+            except Exception as e:
+                print(f"Error refreshing cached arXiv results: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def cache_stats(self) -> Dict:
+        stats = self.cache.stats()
+        stats["refreshing"] = len(self._refreshing)
+        stats["inflight"] = len(self._inflight)
+        stats["coalesced"] = self._coalesced
+        return stats
+
+    async def _fetch_papers(
+        self,
+        query: Optional[str],
+        categories: Optional[List[str]],
+        max_results: int,
+        start: int,
+        date_from: Optional[str],
+        date_to: Optional[str],
+        sort_by: str
+    ) -> List[Dict]:
+        """
+        Fetch and parse results from the arXiv API
+
+        Date ranges are sent to arXiv as a submittedDate clause. If checking
+        them against the published date still leaves the page short, further
+        pages are fetched until it is full or ARXIV_FETCH_BUDGET runs out.
+        """
+        from_date = parse_day(date_from)
+        to_date = parse_day(date_to)
+
         # Build search query
         search_terms = []
 
@@ -38,7 +265,12 @@ class ArxivClient:
 
         if not search_terms:
             # Default: get recent papers from popular CS categories
-            search_terms.append('(cat:cs.AI OR cat:cs.LG OR cat:cs.CL OR cat:cs.CV)')
+            cat_query = " OR ".join([f'cat:{cat}' for cat in DEFAULT_CATEGORIES])
+            search_terms.append(f'({cat_query})')
+
+        date_clause = _submitted_date_clause(from_date, to_date)
+        if date_clause:
+            search_terms.append(date_clause)
 
         final_query = " AND ".join(search_terms)
 
@@ -49,85 +281,127 @@ class ArxivClient:
         elif sort_by == "updated":
             sort_param = "lastUpdatedDate"
 
-        # Make request to arXiv API
-        params = {
-            "search_query": final_query,
-            "start": start,
-            "max_results": max_results,
-            "sortBy": sort_param,
-            "sortOrder": "descending"
-        }
+        papers = []
+        offset = start
+        fetches = 0
+        while True:
+            page = await self._fetch_page({
+                "search_query": final_query,
+                "start": offset,
+                "max_results": max_results,
+                "sortBy": sort_param,
+                "sortOrder": "descending"
+            })
+            fetches += 1
+            offset += len(page)
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-
-                # Parse XML response
-                feed = feedparser.parse(response.text)
-
-                papers = []
-                for entry in feed.entries:
-                    # Parse authors
-                    authors = [author.name for author in entry.get('authors', [])]
-
-                    # Parse categories
-                    categories = []
-                    for tag in entry.get('tags', []):
-                        categories.append(tag.term)
-
-                    # Get arXiv ID
-                    arxiv_id = entry.id.split('/abs/')[-1]
-
-                    # Published date
-                    published_date = entry.published if hasattr(entry, 'published') else ""
-
-                    # Filter by date if specified
-                    if date_from or date_to:
-                        try:
-                            pub_date = datetime.strptime(published_date[:10], "%Y-%m-%d")
-                            if date_from:
-                                from_date = datetime.strptime(date_from, "%Y-%m-%d")
-                                if pub_date < from_date:
-                                    continue
-                            if date_to:
-                                to_date = datetime.strptime(date_to, "%Y-%m-%d")
-                                if pub_date > to_date:
-                                    continue
-                        except:
-                            pass
-
-                    # Build paper dict
-                    paper = {
-                        "id": arxiv_id,
-                        "arxiv_id": arxiv_id,
-                        "title": entry.title.replace('\n', ' ').strip(),
-                        "authors": authors,
-                        "abstract": entry.summary.replace('\n', ' ').strip(),
-                        "categories": categories,
-                        "publishedDate": published_date,
-                        "published_date": published_date,
-                        "pdfUrl": entry.link.replace('/abs/', '/pdf/') if hasattr(entry, 'link') else None,
-                        "pdf_url": entry.link.replace('/abs/', '/pdf/') if hasattr(entry, 'link') else None,
-                        "sourceUrl": entry.id,
-                        "source_url": entry.id
-                    }
-                    papers.append(paper)
-
-                # Rate limiting
-                await asyncio.sleep(self.rate_limit_delay)
-
-                return papers
+            if date_clause:
+                page = [paper for paper in page if _in_date_range(paper["published_date"], from_date, to_date)]
+            papers.extend(page)
 
-        except Exception as e:
-            print(f"Error fetching papers from arXiv: {e}")
-            return []
+            # Stop when the page is full, upstream is exhausted, or the budget is spent
+            if (
+                not date_clause
+                or len(papers) >= max_results
+                or offset - start < fetches * max_results
+                or fetches >= settings.ARXIV_FETCH_BUDGET
+            ):
+                break
+
+        return papers[:max_results]
+
+    async def _fetch_page(self, params: Dict) -> List[Dict]:
+        """Make one rate-limited request and parse entries as they stream in"""
+        client = await self._get_client()
+        await self.rate_limiter.acquire()
+        self._requests_sent += 1
+
+        papers = []
+        async with client.stream("GET", self.base_url, params=params) as response:
+            response.raise_for_status()
+            async for paper in aiter_papers(response.aiter_bytes()):
+                papers.append(paper)
+
+        return papers
+
+    async def fetch_recent(self, category: str, start: int = 0, max_results: int = 100) -> List[Dict]:
+        """
+        Fetch a page of a category's listing, most recently updated first.
+        Bypasses the search cache; used by the catalog harvester.
+        """
+        return await self._fetch_papers(None, [category], max_results, start, None, None, "updated")
 
     async def get_paper_by_id(self, arxiv_id: str) -> Optional[Dict]:
         """Get a specific paper by arXiv ID"""
-        papers = await self.search_papers(query=f"id:{arxiv_id}", max_results=1)
+        papers = await self.get_papers_by_ids([arxiv_id])
         return papers[0] if papers else None
 
+    async def get_papers_by_ids(self, arxiv_ids: List[str]) -> List[Dict]:
+        """
+        Get several papers by arXiv ID, in the requested order.
+        IDs arXiv doesn't know are left out.
+        """
+        found = await self.lookup_papers(arxiv_ids)
+        return [found[arxiv_id] for arxiv_id in arxiv_ids if arxiv_id in found]
+
+    def cached_papers(self, arxiv_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Find papers in cached search results and lookups, without calling
+        arXiv. Returns copies keyed by arXiv ID; IDs not cached are omitted.
+        """
+        wanted = set(arxiv_ids)
+        found: Dict[str, Dict] = {}
+        for value in self.cache.values():
+            for paper in value if isinstance(value, list) else [value]:
+                if paper["arxiv_id"] in wanted and paper["arxiv_id"] not in found:
+                    found[paper["arxiv_id"]] = dict(paper)
+            if len(found) == len(wanted):
+                break
+        return found
+
+    async def lookup_papers(self, arxiv_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Look up papers by arXiv ID using the id_list parameter
+
+        Cached papers are served locally and only misses are fetched, in
+        chunks of ARXIV_ID_LIST_CHUNK. Returns a dict keyed by the requested
+        IDs; versionless IDs match the latest version arXiv returns.
+        """
+        found: Dict[str, Dict] = {}
+        misses = []
+        for arxiv_id in dict.fromkeys(arxiv_ids):
+            cached, _ = self.cache.get(("id", arxiv_id))
+            if cached is not None:
+                found[arxiv_id] = cached
+            else:
+                misses.append(arxiv_id)
+
+        chunk_size = settings.ARXIV_ID_LIST_CHUNK
+        for i in range(0, len(misses), chunk_size):
+            chunk = misses[i:i + chunk_size]
+            try:
+                papers = await self._fetch_page({
+                    "id_list": ",".join(chunk),
+                    "start": 0,
+                    "max_results": len(chunk)
+                })
+            except Exception as e:
+                print(f"Error fetching papers from arXiv: {e}")
+                continue
+
+            by_id = {}
+            for paper in papers:
+                by_id[paper["arxiv_id"]] = paper
+                by_id.setdefault(strip_version(paper["arxiv_id"]), paper)
+
+            for arxiv_id in chunk:
+                paper = by_id.get(arxiv_id) or by_id.get(strip_version(arxiv_id))
+                if paper is not None:
+                    self.cache.set(("id", arxiv_id), paper)
+                    found[arxiv_id] = paper
+
+        return {arxiv_id: dict(paper) for arxiv_id, paper in found.items()}
+
 
 # Singleton instance
 arxiv_client = ArxivClient()
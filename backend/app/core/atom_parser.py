@@ -0,0 +1,119 @@
+from typing import AsyncIterable, Dict, Iterable, Iterator, AsyncIterator, List, Optional
+from xml.etree.ElementTree import Element, XMLPullParser
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+_ENTRY = ATOM + "entry"
+
+
+def _text(elem: Element, tag: str) -> Optional[str]:
+    child = elem.find(tag)
+    if child is None:
+        return None
+    return (child.text or "").strip()
+
+
+def _clean(value: str) -> str:
+    return value.replace('\n', ' ').strip()
+
+
+def entry_to_paper(entry: Element) -> Dict:
+    """Build a paper dict from one Atom <entry> element"""
+    source_url = _text(entry, ATOM + "id") or ""
+    arxiv_id = source_url.split('/abs/')[-1]
+
+    published_date = _text(entry, ATOM + "published")
+    if published_date is None:
+        published_date = ""
+    updated_date = _text(entry, ATOM + "updated")
+    if updated_date is None:
+        updated_date = published_date
+
+    # The abstract page is the rel="alternate" link; fall back to the id like feedparser
+    link = source_url
+    for link_elem in entry.iter(ATOM + "link"):
+        if link_elem.get("rel", "alternate") == "alternate" and link_elem.get("href"):
+            link = link_elem.get("href")
+            break
+    pdf_url = link.replace('/abs/', '/pdf/') if link else None
+
+    title = _clean(_text(entry, ATOM + "title") or "")
+    abstract = _clean(_text(entry, ATOM + "summary") or "")
+
+    return {
+        "id": arxiv_id,
+        "arxiv_id": arxiv_id,
+        "title": title,
+        "authors": [
+            (author.findtext(ATOM + "name") or "").strip()
+            for author in entry.iter(ATOM + "author")
+        ],
+        "abstract": abstract,
+        "categories": [
+            category.get("term")
+            for category in entry.iter(ATOM + "category")
+            if category.get("term") is not None
+        ],
+        "publishedDate": published_date,
+        "published_date": published_date,
+        "updated_date": updated_date,
+        "pdfUrl": pdf_url,
+        "pdf_url": pdf_url,
+        "sourceUrl": source_url,
+        "source_url": source_url
+    }
+
+
+class AtomStreamParser:
+    """
+    Incremental parser for arXiv Atom feeds.
+
+    Bytes are fed in as they arrive and each <entry> is turned into a paper
+    dict as soon as its closing tag is seen. Finished entries are detached
+    from the tree, so memory stays bounded by a single entry rather than the
+    whole response.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root: Optional[Element] = None
+
+    def feed(self, data: bytes) -> List[Dict]:
+        """Feed a chunk of the response; returns the entries it completed"""
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        """Signal end of input; returns any remaining entries"""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        papers = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+            elif elem.tag == _ENTRY:
+                papers.append(entry_to_paper(elem))
+                if self._root is not None and elem in self._root:
+                    self._root.remove(elem)
+                elem.clear()
+        return papers
+
+
+def iter_papers(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Yield paper dicts one by one from an iterable of response chunks"""
+    parser = AtomStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_papers(chunks: AsyncIterable[bytes]) -> AsyncIterator[Dict]:
+    """Yield paper dicts one by one from an async byte stream (e.g. httpx)"""
+    parser = AtomStreamParser()
+    async for chunk in chunks:
+        for paper in parser.feed(chunk):
+            yield paper
+    for paper in parser.close():
+        yield paper
@@ -0,0 +1,128 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+from ..config import settings
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry TTLs.
+
+    Entries are fresh until their TTL passes, then stale for a further
+    `stale_ttl` seconds so callers can serve them while revalidating in the
+    background. Eviction is least-recently-used, bounded both by entry
+    count and by the approximate serialized size of the values.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, stale_ttl: float = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (value, size, fresh_until, stale_until)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float, float]]" = OrderedDict()
+        self._bytes = 0
+
+        # Stats
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """
+        Look up a key. Returns (value, is_stale); value is None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        value, size, fresh_until, stale_until = entry
+        now = time.monotonic()
+        if now >= stale_until:
+            self._remove(key)
+            self.misses += 1
+            return None, False
+
+        self._entries.move_to_end(key)
+        if now >= fresh_until:
+            self.stale_hits += 1
+            return value, True
+
+        self.hits += 1
+        return value, False
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting least-recently-used entries to fit"""
+        if isinstance(value, (bytes, str)):
+            size = len(value)
+        else:
+            size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        self._entries[key] = (value, size, now + ttl, now + ttl + self.stale_ttl)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def values(self) -> Iterator[Any]:
+        """Unexpired values, without touching LRU order or the hit counters"""
+        now = time.monotonic()
+        for value, _, _, stale_until in list(self._entries.values()):
+            if now < stale_until:
+                yield value
+
+    def delete(self, key: Hashable):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
+
+
+# Auth-relevant user fields, keyed by user id (see dependencies.get_current_user)
+auth_user_cache = TTLCache(
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    max_bytes=settings.AUTH_USER_CACHE_MAX_BYTES,
+    ttl=settings.AUTH_USER_CACHE_TTL
+)
+
+# Rendered saved-paper exports, keyed by (user, format, tag, library version, gzip)
+export_cache = TTLCache(
+    max_entries=settings.EXPORT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.EXPORT_CACHE_MAX_BYTES,
+    ttl=settings.EXPORT_CACHE_TTL
+)
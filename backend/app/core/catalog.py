@@ -0,0 +1,412 @@
+import json
+from typing import List, Dict, Optional
+from datetime import timedelta
+from sqlalchemy import exists, func, or_, inspect, insert, select, text, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import Paper, SavedPaper, User
+from ..utils import parse_day
+from .arxiv_client import DEFAULT_CATEGORIES, arxiv_client, strip_version
+from .search_index import apply_fulltext
+
+
+def paper_to_dict(paper: Paper) -> Dict:
+    """Render a catalog row in the same shape ArxivClient returns"""
+    return {
+        "id": paper.arxiv_id,
+        "arxiv_id": paper.arxiv_id,
+        "title": paper.title,
+        "authors": paper.authors,
+        "abstract": paper.abstract,
+        "categories": paper.categories,
+        "publishedDate": paper.published_date,
+        "published_date": paper.published_date,
+        "updated_date": paper.updated_date,
+        "pdfUrl": paper.pdf_url,
+        "pdf_url": paper.pdf_url,
+        "sourceUrl": paper.source_url,
+        "source_url": paper.source_url
+    }
+
+
+def upsert_papers(db: Session, papers: List[Dict], chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Insert new papers and refresh existing ones whose arXiv updated date
+    moved forward. Rows the harvester hasn't seen before are always
+    refreshed, since their metadata came from a save rather than a harvest.
+    Papers are matched by arXiv ID without the version, so a revision
+    replaces the row (including its versioned arxiv_id) instead of adding a
+    second one. Returns counts of inserted, updated and unchanged rows.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    # Keep only the newest version of each paper in the batch
+    latest: Dict[str, Dict] = {}
+    for paper in papers:
+        base_id = strip_version(paper["arxiv_id"])
+        current = latest.get(base_id)
+        if current is None or paper["updated_date"] > current["updated_date"]:
+            latest[base_id] = paper
+
+    incoming = list(latest.items())
+    for i in range(0, len(incoming), chunk_size):
+        chunk = incoming[i:i + chunk_size]
+        updated_ids = []
+        existing = {
+            row.base_id: row
+            for row in db.query(Paper).filter(
+                Paper.base_id.in_([base_id for base_id, _ in chunk])
+            ).all()
+        }
+
+        for base_id, paper in chunk:
+            row = existing.get(base_id)
+            if row is None:
+                db.add(Paper(
+                    arxiv_id=paper["arxiv_id"],
+                    base_id=base_id,
+                    title=paper["title"],
+                    authors=paper["authors"],
+                    abstract=paper["abstract"],
+                    categories=paper["categories"],
+                    published_date=paper["published_date"],
+                    updated_date=paper["updated_date"],
+                    pdf_url=paper["pdf_url"],
+                    source_url=paper["source_url"],
+                    harvested=True
+                ))
+                counts["inserted"] += 1
+            elif not row.harvested or paper["updated_date"] > row.updated_date:
+                row.arxiv_id = paper["arxiv_id"]
+                row.title = paper["title"]
+                row.authors = paper["authors"]
+                row.abstract = paper["abstract"]
+                row.categories = paper["categories"]
+                row.published_date = paper["published_date"]
+                row.updated_date = paper["updated_date"]
+                row.pdf_url = paper["pdf_url"]
+                row.source_url = paper["source_url"]
+                row.harvested = True
+                updated_ids.append(row.id)
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+
+        if updated_ids:
+            # Exports of libraries holding these papers are now out of date
+            db.query(User).filter(User.id.in_(
+                select(SavedPaper.user_id).where(SavedPaper.paper_id.in_(updated_ids))
+            )).update({User.library_version: User.library_version + 1}, synchronize_session=False)
+        db.commit()
+
+    return counts
+
+
+def get_or_create_paper(db: Session, paper: Dict) -> Paper:
+    """
+    Return the shared row for a paper, adding it from the given metadata
+    when the catalog doesn't have it yet. Existing rows are left alone;
+    the harvester keeps them current. Any version of the paper matches.
+    The metadata must come from arXiv, never from a request body (see
+    get_or_fetch_papers).
+    """
+    base_id = strip_version(paper["arxiv_id"])
+    row = db.query(Paper).filter(Paper.base_id == base_id).first()
+    if row is not None:
+        return row
+
+    published_date = paper.get("published_date") or ""
+    row = Paper(
+        arxiv_id=paper["arxiv_id"],
+        base_id=base_id,
+        title=paper["title"],
+        authors=paper.get("authors") or [],
+        abstract=paper.get("abstract") or "",
+        categories=paper.get("categories") or [],
+        published_date=published_date,
+        updated_date=paper.get("updated_date") or published_date,
+        pdf_url=paper.get("pdf_url"),
+        source_url=paper.get("source_url") or ""
+    )
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        # Someone else added it at the same time
+        row = db.query(Paper).filter(Paper.base_id == base_id).one()
+    return row
+
+
+def backfill_harvested(db: Session):
+    """
+    Flag catalog rows that predate Paper.harvested. Rows nobody has saved
+    can only have come from the harvester; saved ones are flagged the next
+    time the harvester sees them.
+    """
+    db.query(Paper).filter(
+        ~exists().where(SavedPaper.paper_id == Paper.id)
+    ).update({Paper.harvested: True}, synchronize_session=False)
+    db.commit()
+
+
+def _version(arxiv_id: str) -> int:
+    """2401.12345v2 -> 2; unversioned IDs count as 0"""
+    base_id = strip_version(arxiv_id)
+    return int(arxiv_id[len(base_id) + 1:]) if base_id != arxiv_id else 0
+
+
+def backfill_base_ids(db: Session):
+    """
+    Fill Paper.base_id for rows that predate it. Rows holding other
+    versions of the same paper are merged into the newest one: saves move
+    over to it and the older rows are deleted.
+    """
+    rows = db.query(Paper.id, Paper.arxiv_id, Paper.harvested).order_by(
+        Paper.updated_date.desc(), Paper.id.desc()
+    ).all()
+
+    kept: Dict[str, int] = {}
+    for row in rows:
+        base_id = strip_version(row.arxiv_id)
+        keep_id = kept.get(base_id)
+        if keep_id is None:
+            kept[base_id] = row.id
+            db.query(Paper).filter(Paper.id == row.id).update(
+                {Paper.base_id: base_id}, synchronize_session=False
+            )
+            continue
+
+        db.query(SavedPaper).filter(SavedPaper.paper_id == row.id).update(
+            {SavedPaper.paper_id: keep_id}, synchronize_session=False
+        )
+        if row.harvested:
+            db.query(Paper).filter(Paper.id == keep_id).update(
+                {Paper.harvested: True}, synchronize_session=False
+            )
+        db.query(Paper).filter(Paper.id == row.id).delete(synchronize_session=False)
+    db.commit()
+
+
+def has_category(dialect: str, category: str):
+    """Filter for papers listed under an arXiv category, evaluated in the database"""
+    if dialect == "postgresql":
+        # JSONB containment, served by the GIN index on categories
+        return type_coerce(Paper.categories, JSONB).contains([category])
+    values = func.json_each(Paper.categories).table_valued("value")
+    return exists().where(values.c.value == category)
+
+
+def get_catalog_paper(db: Session, arxiv_id: str) -> Optional[Dict]:
+    """Look up a single harvested paper in the local catalog, matching any version"""
+    paper = db.query(Paper).filter(Paper.harvested, Paper.base_id == strip_version(arxiv_id)).first()
+    return paper_to_dict(paper) if paper else None
+
+
+def get_catalog_papers(db: Session, arxiv_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Look up several papers in the local catalog, keyed by the requested
+    arXiv IDs. Like ArxivClient.lookup_papers, an ID matches the stored
+    paper whatever its version. Only harvested rows are served; papers that
+    are only in the table because a user saved them are looked up upstream.
+    """
+    if not arxiv_ids:
+        return {}
+    bases = {arxiv_id: strip_version(arxiv_id) for arxiv_id in arxiv_ids}
+    papers = {
+        paper.base_id: paper_to_dict(paper)
+        for paper in db.query(Paper).filter(
+            Paper.harvested,
+            Paper.base_id.in_(set(bases.values()))
+        ).all()
+    }
+    return {arxiv_id: dict(papers[base_id]) for arxiv_id, base_id in bases.items() if base_id in papers}
+
+
+def search_catalog(
+    db: Session,
+    query: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    max_results: int = 20,
+    start: int = 0,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sort_by: str = "relevance"
+) -> List[Dict]:
+    """
+    Search the local catalog with the same filters as ArxivClient.search_papers.
+    Keyword queries use the full-text index and rank by relevance. Papers
+    that are only in the table because a user saved them are left out.
+    """
+    q = db.query(Paper).filter(Paper.harvested)
+
+    if query:
+        q = apply_fulltext(db, q, query, rank=sort_by == "relevance")
+
+    if not query and not categories:
+        categories = DEFAULT_CATEGORIES
+
+    if categories:
+        dialect = db.get_bind().dialect.name
+        q = q.filter(or_(*[has_category(dialect, cat) for cat in categories]))
+
+    # Dates are stored as ISO-8601 strings, so they compare lexicographically
+    from_date = parse_day(date_from)
+    if from_date:
+        q = q.filter(Paper.published_date >= from_date.strftime("%Y-%m-%d"))
+
+    to_date = parse_day(date_to)
+    if to_date:
+        q = q.filter(Paper.published_date < (to_date + timedelta(days=1)).strftime("%Y-%m-%d"))
+
+    if sort_by == "date":
+        q = q.order_by(Paper.published_date.desc())
+    elif sort_by == "updated" or not query:
+        q = q.order_by(Paper.updated_date.desc())
+
+    return [paper_to_dict(paper) for paper in q.offset(start).limit(max_results).all()]
+
+
+async def find_papers(
+    db: AsyncSession,
+    query: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    max_results: int = 20,
+    start: int = 0,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sort_by: str = "relevance"
+) -> List[Dict]:
+    """
+    Search the local catalog first and fall back to arXiv when the catalog
+    can't fill the whole page. A partial catalog page is still returned if
+    arXiv has nothing (or is unreachable).
+    """
+    filters = dict(
+        query=query,
+        categories=categories,
+        max_results=max_results,
+        start=start,
+        date_from=date_from,
+        date_to=date_to,
+        sort_by=sort_by
+    )
+
+    local_papers = []
+    if settings.CATALOG_SEARCH_ENABLED:
+        local_papers = await db.run_sync(lambda session: search_catalog(session, **filters))
+        if len(local_papers) >= max_results:
+            return local_papers
+
+    papers = await arxiv_client.search_papers(**filters)
+    return papers or local_papers
+
+
+async def get_or_fetch_papers(db: AsyncSession, arxiv_ids: List[str]) -> Dict[str, Paper]:
+    """
+    Return the shared rows for papers being saved, keyed by the requested
+    arXiv IDs. Papers the catalog doesn't have yet are added with metadata
+    looked up on arXiv, so what a client sends is never stored. IDs arXiv
+    doesn't return (unknown, or arXiv unreachable) are left out.
+    """
+    bases = {arxiv_id: strip_version(arxiv_id) for arxiv_id in arxiv_ids}
+    rows = await db.run_sync(lambda session: {
+        row.base_id: row
+        for row in session.query(Paper).filter(Paper.base_id.in_(set(bases.values()))).all()
+    })
+
+    missing = [arxiv_id for arxiv_id, base_id in bases.items() if base_id not in rows]
+    if missing:
+        for arxiv_id, paper in (await arxiv_client.lookup_papers(missing)).items():
+            if bases[arxiv_id] not in rows:
+                rows[bases[arxiv_id]] = await db.run_sync(get_or_create_paper, paper)
+
+    return {arxiv_id: rows[base_id] for arxiv_id, base_id in bases.items() if base_id in rows}
+
+
+# Metadata columns SavedPaper used to copy for every user
+_LEGACY_SAVED_COLUMNS = [
+    "arxiv_id", "title", "authors", "abstract", "categories",
+    "published_date", "pdf_url", "source_url"
+]
+
+
+def migrate_saved_papers(engine: Engine):
+    """
+    Move paper metadata out of legacy saved_papers rows into the shared
+    papers table. Each distinct paper is added to the catalog once (rows it
+    already has are kept), saved_papers gets a paper_id pointing at it, and
+    the copied columns are dropped. Safe to call repeatedly; runs in one
+    transaction. Needs SQLite 3.35+ for DROP COLUMN.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("saved_papers")}
+    legacy = [column for column in _LEGACY_SAVED_COLUMNS if column in columns]
+    if not legacy:
+        return
+
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        # One copy of each paper, taken from the most recent save of its
+        # newest version
+        rows = conn.execute(text(
+            f"SELECT {', '.join(_LEGACY_SAVED_COLUMNS)} FROM saved_papers ORDER BY saved_at DESC"
+        )).mappings().all()
+        papers: Dict[str, Dict] = {}
+        for row in rows:
+            base_id = strip_version(row["arxiv_id"])
+            current = papers.get(base_id)
+            if current is None or _version(row["arxiv_id"]) > _version(current["arxiv_id"]):
+                papers[base_id] = dict(row)
+
+        existing = set()
+        base_ids = list(papers)
+        for i in range(0, len(base_ids), 500):
+            existing.update(conn.execute(
+                select(Paper.base_id).where(Paper.base_id.in_(base_ids[i:i + 500]))
+            ).scalars())
+
+        # The legacy columns hold the lists as JSON text
+        new_papers = [
+            dict(
+                paper,
+                base_id=base_id,
+                authors=json.loads(paper["authors"]),
+                categories=json.loads(paper["categories"]),
+                updated_date=paper["published_date"]
+            )
+            for base_id, paper in papers.items()
+            if base_id not in existing
+        ]
+        if new_papers:
+            conn.execute(insert(Paper), new_papers)
+
+        if "paper_id" not in columns:
+            conn.execute(text("ALTER TABLE saved_papers ADD COLUMN paper_id INTEGER REFERENCES papers(id)"))
+        paper_ids = {}
+        for i in range(0, len(base_ids), 500):
+            paper_ids.update(conn.execute(
+                select(Paper.base_id, Paper.id).where(Paper.base_id.in_(base_ids[i:i + 500]))
+            ).tuples().all())
+        saved_ids = {row["arxiv_id"] for row in rows}
+        if saved_ids:
+            conn.execute(
+                text("UPDATE saved_papers SET paper_id = :paper_id WHERE arxiv_id = :arxiv_id"),
+                [
+                    {"paper_id": paper_ids[strip_version(arxiv_id)], "arxiv_id": arxiv_id}
+                    for arxiv_id in saved_ids
+                ]
+            )
+
+        # SQLite can't drop indexed columns, so drop their indexes first
+        for index in inspect(conn).get_indexes("saved_papers"):
+            if set(index["column_names"]) & set(legacy):
+                conn.execute(text(f"DROP INDEX {index['name']}"))
+        for column in legacy:
+            conn.execute(text(f"ALTER TABLE saved_papers DROP COLUMN {column}"))
+        if dialect == "postgresql":
+            conn.execute(text("ALTER TABLE saved_papers ALTER COLUMN paper_id SET NOT NULL"))
+
+    print(f"Migrated {len(rows)} saved papers ({len(papers)} distinct) to the shared papers table")
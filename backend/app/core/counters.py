@@ -0,0 +1,51 @@
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from ..models import User, Follow, SavedPaper
+
+# Counter columns on User, e.g. for spotting them in create_missing_columns()
+USER_COUNT_COLUMNS = {"users.followers_count", "users.following_count", "users.saved_papers_count"}
+
+
+def adjust_user_counts(db: Session, user_id: int, **deltas: int):
+    """
+    Add to a user's denormalized counters, e.g. followers_count=1. Done as a
+    single UPDATE in the caller's transaction, so concurrent changes can't
+    overwrite each other.
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {getattr(User, name): getattr(User, name) + delta for name, delta in deltas.items()},
+        synchronize_session="evaluate"
+    )
+
+
+def bump_library_version(db: Session, user_id: int):
+    """
+    Mark a user's saved papers or tags as changed, so exports cached for
+    the old version are no longer served. Runs in the caller's transaction.
+    """
+    adjust_user_counts(db, user_id, library_version=1)
+
+
+def reconcile_user_counts(db: Session) -> int:
+    """
+    Recount every user's followers, following and saved papers and repair
+    the ones that drifted (e.g. after users were deleted). Commits and
+    returns the number of users fixed.
+    """
+    followers = select(func.count(Follow.id)).where(Follow.following_id == User.id).scalar_subquery()
+    following = select(func.count(Follow.id)).where(Follow.follower_id == User.id).scalar_subquery()
+    saved_papers = select(func.count(SavedPaper.id)).where(SavedPaper.user_id == User.id).scalar_subquery()
+
+    result = db.execute(
+        update(User).where(or_(
+            User.followers_count != followers,
+            User.following_count != following,
+            User.saved_papers_count != saved_papers
+        )).values(
+            followers_count=followers,
+            following_count=following,
+            saved_papers_count=saved_papers
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,168 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import User
+from .catalog import find_papers
+from .interactions import get_seen_ids
+from .ranking import load_profile, rerank
+
+_UNLOADED = object()
+
+
+def user_categories(user: User) -> List[str]:
+    """Categories from a user's research interests (stored as a JSON list)"""
+    interests = user.research_interests
+    if not isinstance(interests, list):
+        return []
+    return [interest for interest in interests if isinstance(interest, str)]
+
+
+class UserDeck:
+    """Queue of unseen papers prepared for one user"""
+
+    def __init__(self, categories: List[str]):
+        self.categories = categories
+        self.papers: Deque[Dict] = deque()
+        self.ids: Set[str] = set()
+        self.next_start = 0
+        self.refill_task: Optional[asyncio.Task] = None
+        self.grown = asyncio.Event()  # Set whenever a refill adds papers
+
+
+class DeckManager:
+    """
+    Keeps a per-user queue of unseen papers built from research interests.
+
+    Requests are served straight from the queue; when it drops below
+    DECK_LOW_WATER a background task tops it back up to DECK_TARGET_SIZE.
+    Papers leave the queue as the user records interactions with them.
+    Each fetched page is ordered by the user's interest profile before it
+    joins the queue.
+    """
+
+    def __init__(self):
+        self.target_size = settings.DECK_TARGET_SIZE
+        self.low_water = settings.DECK_LOW_WATER
+        self.page_size = settings.DECK_PAGE_SIZE
+        self.max_fetches = settings.DECK_MAX_FETCHES
+        self.max_users = settings.DECK_MAX_USERS
+        self._decks: "OrderedDict[int, UserDeck]" = OrderedDict()
+
+        # Stats
+        self._served = 0
+        self._waited = 0
+        self._refills = 0
+
+    def _get(self, user: User) -> UserDeck:
+        categories = user_categories(user)
+        deck = self._decks.get(user.id)
+
+        # Rebuild from scratch when interests change
+        if deck is None or deck.categories != categories:
+            if deck is not None and deck.refill_task is not None:
+                deck.refill_task.cancel()
+            deck = UserDeck(categories)
+            self._decks[user.id] = deck
+
+        self._decks.move_to_end(user.id)
+        while len(self._decks) > self.max_users:
+            _, evicted = self._decks.popitem(last=False)
+            if evicted.refill_task is not None:
+                evicted.refill_task.cancel()
+
+        return deck
+
+    async def get_deck(self, user: User, count: int) -> List[Dict]:
+        """Return the next `count` papers for a user without removing them"""
+        deck = self._get(user)
+
+        if len(deck.papers) < count:
+            # Nothing prepared yet (cold start): wait until the refill has
+            # added enough papers and let it finish in the background. The
+            # task may be cancelled by an interest change or LRU eviction,
+            # so wait without inheriting its outcome and serve what it added
+            self._waited += 1
+            refill = self._ensure_refill(user.id, deck)
+            while len(deck.papers) < count and not refill.done():
+                deck.grown.clear()
+                grown = asyncio.ensure_future(deck.grown.wait())
+                await asyncio.wait([refill, grown], return_when=asyncio.FIRST_COMPLETED)
+                grown.cancel()
+        elif len(deck.papers) < self.low_water:
+            self._ensure_refill(user.id, deck)
+
+        self._served += 1
+        return [dict(paper) for paper in list(deck.papers)[:count]]
+
+    def remove(self, user_id: int, arxiv_id: str):
+        """Drop a paper from a user's deck once they've interacted with it"""
+        deck = self._decks.get(user_id)
+        if deck is None or arxiv_id not in deck.ids:
+            return
+        deck.ids.discard(arxiv_id)
+        deck.papers = deque(paper for paper in deck.papers if paper["arxiv_id"] != arxiv_id)
+
+    def _ensure_refill(self, user_id: int, deck: UserDeck) -> asyncio.Task:
+        if deck.refill_task is None or deck.refill_task.done():
+            deck.refill_task = asyncio.create_task(self._refill(user_id, deck))
+        return deck.refill_task
+
+    async def _refill(self, user_id: int, deck: UserDeck):
+        self._refills += 1
+        fetches = 0
+        profile = _UNLOADED
+        while len(deck.papers) < self.target_size and fetches < self.max_fetches:
+            db = AsyncSessionLocal()
+            try:
+                page = await find_papers(
+                    db,
+                    categories=deck.categories or None,
+                    max_results=self.page_size,
+                    start=deck.next_start,
+                    sort_by="date"
+                )
+                fetches += 1
+                if not page:
+                    break
+                deck.next_start += self.page_size
+
+                candidates = [paper for paper in page if paper["arxiv_id"] not in deck.ids]
+                seen_ids = await db.run_sync(get_seen_ids, user_id, [paper["arxiv_id"] for paper in candidates])
+                candidates = [paper for paper in candidates if paper["arxiv_id"] not in seen_ids]
+
+                if settings.RANKING_ENABLED:
+                    if profile is _UNLOADED:
+                        profile = await db.run_sync(load_profile, user_id)
+                    candidates = rerank(candidates, profile)
+            except Exception as e:
+                print(f"Error refilling paper deck for user {user_id}: {e}")
+                break
+            finally:
+                await db.close()
+
+            for paper in candidates:
+                deck.papers.append(paper)
+                deck.ids.add(paper["arxiv_id"])
+            deck.grown.set()
+
+    async def close(self):
+        """Cancel outstanding refills (called on app shutdown)"""
+        for deck in self._decks.values():
+            if deck.refill_task is not None:
+                deck.refill_task.cancel()
+        self._decks.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "users": len(self._decks),
+            "queued_papers": sum(len(deck.papers) for deck in self._decks.values()),
+            "served": self._served,
+            "waited_for_refill": self._waited,
+            "refills": self._refills
+        }
+
+
+# Singleton instance
+deck_manager = DeckManager()
@@ -1,18 +1,53 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from ..database import get_db
 from ..models import User
+from .cache import auth_user_cache
 from .security import verify_token
 
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
 
+# Columns kept in auth_user_cache; everything else loads on first access
+AUTH_USER_FIELDS = ("id", "email", "is_active", "research_interests")
+
+
+def invalidate_auth_user(user_id: int):
+    """
+    Drop a user's cached auth fields. Call after changing any of
+    AUTH_USER_FIELDS (profile updates, deactivation) so the next request
+    sees the change instead of waiting for AUTH_USER_CACHE_TTL.
+    """
+    auth_user_cache.delete(user_id)
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    Load a token's user, answering from auth_user_cache when possible.
+
+    A cached user is attached to the session without a query, so changes
+    to it are still flushed on commit. Columns outside AUTH_USER_FIELDS are
+    unloaded: read them inside db.run_sync or select them explicitly.
+    """
+    fields, _ = auth_user_cache.get(user_id)
+    if fields is not None:
+        user = User(**fields)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if user is not None:
+        auth_user_cache.set(user_id, {field: getattr(user, field) for field in AUTH_USER_FIELDS})
+    return user
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Dependency to get the current authenticated user from JWT token
@@ -33,7 +68,7 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await _load_user(db, user_id)
     if user is None:
         raise credentials_exception
 
@@ -56,7 +91,7 @@ async def get_current_active_user(
 
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
     """
     Dependency to optionally get the current user (doesn't raise exception if not authenticated)
@@ -75,7 +110,7 @@ async def get_optional_user(
         if user_id is None:
             return None
 
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await _load_user(db, user_id)
         return user
     except:
         return None
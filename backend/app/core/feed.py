@@ -0,0 +1,185 @@
+"""
+Activity timeline built with fan-out on write.
+
+When someone saves a public paper, one feed_items row is written per
+follower in the same transaction, so reading a feed is an indexed range
+scan over (user_id, created_at). Authors with more than
+FEED_FANOUT_MAX_FOLLOWERS followers are skipped at write time; their saves
+are read directly from saved_papers when a follower loads the feed and
+merged into the page.
+"""
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import DateTime, and_, delete, insert, literal, or_, select
+from sqlalchemy.orm import Session, joinedload
+from ..config import settings
+from ..models import User, Follow, SavedPaper, FeedEntry
+from ..utils import as_utc
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, saved_paper_id: int) -> str:
+    raw = f"{as_utc(created_at).isoformat()}|{saved_paper_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[Cursor]:
+    """Parse a cursor from encode_cursor; None if it's malformed"""
+    try:
+        created_at, saved_paper_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return as_utc(datetime.fromisoformat(created_at)), int(saved_paper_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _fans_out(author: User) -> bool:
+    return (author.followers_count or 0) <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_save(db: Session, saved_paper: SavedPaper, author: User):
+    """Copy a public save into every follower's timeline (one INSERT ... SELECT)"""
+    if not _fans_out(author):
+        return
+    db.execute(insert(FeedEntry).from_select(
+        ["user_id", "actor_id", "saved_paper_id", "created_at"],
+        select(
+            Follow.follower_id,
+            literal(author.id),
+            literal(saved_paper.id),
+            literal(saved_paper.saved_at, DateTime(timezone=True))
+        ).where(Follow.following_id == author.id)
+    ))
+
+
+def remove_save(db: Session, saved_paper_id: int):
+    """Take a save out of every timeline (deleted or made private)"""
+    db.execute(delete(FeedEntry).where(FeedEntry.saved_paper_id == saved_paper_id))
+
+
+def _recent_saves(db: Session, author_id: int) -> List[Tuple[int, datetime]]:
+    return db.query(SavedPaper.id, SavedPaper.saved_at).filter(
+        SavedPaper.user_id == author_id,
+        SavedPaper.is_public == 1
+    ).order_by(SavedPaper.saved_at.desc()).limit(settings.FEED_BACKFILL_ITEMS).all()
+
+
+def add_follow(db: Session, follower_id: int, author: User):
+    """Backfill a new follower's timeline with the author's recent public saves"""
+    if not _fans_out(author):
+        return
+    rows = [
+        {"user_id": follower_id, "actor_id": author.id, "saved_paper_id": saved_paper_id, "created_at": saved_at}
+        for saved_paper_id, saved_at in _recent_saves(db, author.id)
+    ]
+    if rows:
+        db.execute(insert(FeedEntry), rows)
+
+
+def remove_follow(db: Session, follower_id: int, author_id: int):
+    """Drop an unfollowed author's saves from the follower's timeline"""
+    db.execute(delete(FeedEntry).where(
+        FeedEntry.user_id == follower_id,
+        FeedEntry.actor_id == author_id
+    ))
+
+
+def rebuild_feed(db: Session) -> int:
+    """
+    Rebuild every timeline from follows and recent public saves (backfill,
+    or repairing drift). Relies on accurate followers_count. Commits and
+    returns the number of items written.
+    """
+    db.execute(delete(FeedEntry))
+
+    written = 0
+    authors = db.query(User).filter(
+        User.followers_count > 0,
+        User.followers_count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).all()
+    for author in authors:
+        saves = _recent_saves(db, author.id)
+        if not saves:
+            continue
+        follower_ids = [follower_id for (follower_id,) in db.query(Follow.follower_id).filter(
+            Follow.following_id == author.id
+        )]
+        rows = [
+            {"user_id": follower_id, "actor_id": author.id, "saved_paper_id": saved_paper_id, "created_at": saved_at}
+            for follower_id in follower_ids
+            for saved_paper_id, saved_at in saves
+        ]
+        if rows:
+            db.execute(insert(FeedEntry), rows)
+            written += len(rows)
+
+    db.commit()
+    return written
+
+
+def before_cursor(created_at_column, id_column, cursor: Cursor):
+    """Keyset condition for rows after the cursor in (created_at, id) DESC order"""
+    created_at, saved_paper_id = cursor
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < saved_paper_id)
+    )
+
+
+def read_feed(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[Cursor] = None
+) -> Tuple[List[Tuple[datetime, SavedPaper]], Dict[int, User], Optional[str]]:
+    """
+    One page of a user's timeline, newest first: (saved_at, saved paper)
+    pairs, their authors keyed by id, and the cursor for the next page
+    (None on the last page).
+    """
+    q = db.query(FeedEntry).options(joinedload(FeedEntry.saved_paper)).filter(FeedEntry.user_id == user_id)
+    if cursor:
+        q = q.filter(before_cursor(FeedEntry.created_at, FeedEntry.saved_paper_id, cursor))
+    entries = q.order_by(
+        FeedEntry.created_at.desc(),
+        FeedEntry.saved_paper_id.desc()
+    ).limit(limit + 1).all()
+    candidates = [(entry.created_at, entry.saved_paper) for entry in entries]
+
+    # Authors with too many followers to fan out are read at feed time
+    large_author_ids = [author_id for (author_id,) in db.query(User.id).join(
+        Follow, Follow.following_id == User.id
+    ).filter(
+        Follow.follower_id == user_id,
+        User.followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS
+    )]
+    if large_author_ids:
+        q = db.query(SavedPaper).filter(
+            SavedPaper.user_id.in_(large_author_ids),
+            SavedPaper.is_public == 1
+        )
+        if cursor:
+            q = q.filter(before_cursor(SavedPaper.saved_at, SavedPaper.id, cursor))
+        saves = q.order_by(SavedPaper.saved_at.desc(), SavedPaper.id.desc()).limit(limit + 1).all()
+        candidates.extend((saved_paper.saved_at, saved_paper) for saved_paper in saves)
+
+    # Merge both sources; an author who crossed the threshold can appear in both
+    merged = []
+    seen = set()
+    for created_at, saved_paper in sorted(
+        candidates, key=lambda candidate: (as_utc(candidate[0]), candidate[1].id), reverse=True
+    ):
+        if saved_paper.id in seen or not saved_paper.is_public:
+            continue
+        if cursor and (as_utc(created_at), saved_paper.id) >= cursor:
+            continue
+        seen.add(saved_paper.id)
+        merged.append((created_at, saved_paper))
+
+    page = merged[:limit]
+    next_cursor = encode_cursor(page[-1][0], page[-1][1].id) if len(merged) > limit else None
+
+    author_ids = {saved_paper.user_id for _, saved_paper in page}
+    authors = {user.id: user for user in db.query(User).filter(User.id.in_(author_ids))} if author_ids else {}
+    return page, authors, next_cursor
@@ -0,0 +1,155 @@
+"""
+Background harvester that keeps the local paper catalog current.
+
+Each run walks the configured categories' listings newest-updated first and
+upserts them into the `papers` table, stopping once it reaches papers it has
+already seen. It can be pointed at a local stub server through
+ARXIV_API_BASE, or fed a recorded Atom response offline:
+
+    python -m app.harvest --fixture recorded_feed.xml
+"""
+import asyncio
+from typing import List, Dict, Optional
+from sqlalchemy import func
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Paper
+from .arxiv_client import ArxivClient, arxiv_client, parse_feed
+from .catalog import has_category, upsert_papers
+
+
+class ArxivHarvester:
+    """Incrementally pulls recent arXiv listings into the local catalog"""
+
+    def __init__(
+        self,
+        client: ArxivClient = arxiv_client,
+        session_factory=SessionLocal,
+        categories: Optional[List[str]] = None
+    ):
+        self.client = client
+        self.session_factory = session_factory
+        self.categories = categories or [
+            cat.strip() for cat in settings.HARVEST_CATEGORIES.split(",") if cat.strip()
+        ]
+        self.page_size = settings.HARVEST_PAGE_SIZE
+        self.max_pages = settings.HARVEST_MAX_PAGES
+        self.interval = settings.HARVEST_INTERVAL_SECONDS
+        self._watermarks: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self._runs = 0
+        self._errors = 0
+        self._totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    def _load_watermark(self, category: str) -> str:
+        """Latest updated date already stored for a category"""
+        db = self.session_factory()
+        try:
+            latest = db.query(func.max(Paper.updated_date)).filter(
+                Paper.harvested,
+                has_category(db.get_bind().dialect.name, category)
+            ).scalar()
+            return latest or ""
+        finally:
+            db.close()
+
+    def ingest(self, papers: List[Dict]) -> Dict[str, int]:
+        """Upsert already-parsed papers into the catalog"""
+        db = self.session_factory()
+        try:
+            counts = upsert_papers(db, papers)
+        finally:
+            db.close()
+
+        for key, value in counts.items():
+            self._totals[key] += value
+        return counts
+
+    def ingest_feed(self, feed_text: str) -> Dict[str, int]:
+        """Upsert every entry of a raw Atom response (e.g. a recorded fixture)"""
+        return self.ingest(parse_feed(feed_text))
+
+    async def harvest_category(self, category: str) -> Dict[str, int]:
+        """Page through a category until reaching already-harvested papers"""
+        if category not in self._watermarks:
+            self._watermarks[category] = await asyncio.to_thread(self._load_watermark, category)
+        watermark = self._watermarks[category]
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        newest = watermark
+
+        for page in range(self.max_pages):
+            papers = await self.client.fetch_recent(
+                category,
+                start=page * self.page_size,
+                max_results=self.page_size
+            )
+            if not papers:
+                break
+
+            # Sync session work runs off the event loop, like the trending refresh
+            counts_page = await asyncio.to_thread(self.ingest, papers)
+            for key, value in counts_page.items():
+                counts[key] += value
+
+            updated_dates = [paper["updated_date"] for paper in papers]
+            newest = max(newest, max(updated_dates))
+            if min(updated_dates) <= watermark or len(papers) < self.page_size:
+                break
+
+        self._watermarks[category] = newest
+        return counts
+
+    async def harvest_once(self) -> Dict[str, int]:
+        """Harvest every configured category once"""
+        totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for category in self.categories:
+            try:
+                counts = await self.harvest_category(category)
+            except Exception as e:
+                self._errors += 1
+                print(f"Error harvesting arXiv category {category}: {e}")
+                continue
+
+            for key, value in counts.items():
+                totals[key] += value
+
+        self._runs += 1
+        return totals
+
+    async def run_forever(self):
+        while True:
+            await self.harvest_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the periodic harvest loop (called on app startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Cancel the harvest loop (called on app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "categories": self.categories,
+            "runs": self._runs,
+            "errors": self._errors,
+            "watermarks": dict(self._watermarks),
+            **self._totals
+        }
+
+
+# Singleton instance
+arxiv_harvester = ArxivHarvester()
+
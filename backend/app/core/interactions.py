@@ -0,0 +1,292 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from ..models import PaperInteraction
+from .arxiv_client import arxiv_client, strip_version
+from .catalog import get_catalog_papers, get_or_create_paper
+from .ranking import SIGNAL_WEIGHTS, update_profiles
+
+
+class InteractionBuffer:
+    """
+    Write-behind buffer for paper interactions.
+
+    Swipes are queued in memory and written with one bulk INSERT when
+    INTERACTION_FLUSH_SIZE rows are waiting or INTERACTION_FLUSH_INTERVAL
+    seconds have passed, whichever comes first. Identical interactions
+    queued before a flush are coalesced. Pending rows are drained on
+    shutdown.
+
+    If a bulk insert fails, the batch is retried row by row so one bad row
+    can't hold back the rest: rows that fail on their own are dropped. When
+    nothing can be written (the database is down), the batch is queued
+    again, up to INTERACTION_MAX_ATTEMPTS flushes per row.
+
+    After each write, likes, dislikes and saves are queued to be folded into
+    the users' interest profiles by a separate task, so slow profile updates
+    never hold up the next insert. Paper text comes from the catalog or the
+    arXiv result cache, never from new upstream calls; papers found in
+    neither are skipped.
+    """
+
+    def __init__(self):
+        self.flush_size = settings.INTERACTION_FLUSH_SIZE
+        self.flush_interval = settings.INTERACTION_FLUSH_INTERVAL
+        self.max_attempts = settings.INTERACTION_MAX_ATTEMPTS
+        self._pending: Dict[Tuple[int, str, str], datetime] = {}
+        self._attempts: Dict[Tuple[int, str, str], int] = {}  # Failed flushes per queued row
+        self._pending_ids: Dict[int, Set[str]] = {}
+        self._writing_ids: Dict[int, Set[str]] = {}  # Batch being inserted right now
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._loop_task = None
+        self._profile_rows: List[Dict] = []
+        self._profile_task = None
+
+        # Stats
+        self._queued = 0
+        self._coalesced = 0
+        self._written = 0
+        self._flushes = 0
+        self._errors = 0
+        self._dropped = 0
+        self._profile_errors = 0
+
+    def add(self, user_id: int, arxiv_id: str, interaction_type: str):
+        """Queue an interaction; flushes in the background once the batch is full"""
+        key = (user_id, arxiv_id, interaction_type)
+        if key in self._pending:
+            self._coalesced += 1
+        else:
+            self._pending[key] = datetime.now(timezone.utc)
+            self._pending_ids.setdefault(user_id, set()).add(arxiv_id)
+            self._queued += 1
+
+        if len(self._pending) >= self.flush_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def pending_ids(self, user_id: int) -> Set[str]:
+        """Papers this user has interacted with that are not written yet"""
+        return self._pending_ids.get(user_id, set()) | self._writing_ids.get(user_id, set())
+
+    async def flush(self):
+        """Write every queued interaction with one bulk insert"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            # Ids stay visible to pending_ids() until the insert has committed
+            batch, self._pending = self._pending, {}
+            self._writing_ids, self._pending_ids = self._pending_ids, {}
+            rows = [
+                {
+                    "user_id": user_id,
+                    "arxiv_id": arxiv_id,
+                    "interaction_type": interaction_type,
+                    "created_at": created_at
+                }
+                for (user_id, arxiv_id, interaction_type), created_at in batch.items()
+            ]
+
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception as e:
+                self._errors += 1
+                print(f"Error flushing {len(rows)} paper interactions: {e}")
+                try:
+                    failed = await asyncio.to_thread(self._write_each, rows)
+                except Exception as e:
+                    # Nothing could be written; put the batch back for the next flush
+                    print(f"Error writing paper interactions one by one: {e}")
+                    self._requeue(batch)
+                    return
+
+                for index in failed:
+                    print(f"Dropping paper interaction that can't be written: {rows[index]}")
+                self._dropped += len(failed)
+                rows = [row for index, row in enumerate(rows) if index not in failed]
+            finally:
+                self._writing_ids = {}
+
+            for key in batch:
+                self._attempts.pop(key, None)
+            self._written += len(rows)
+            self._flushes += 1
+
+        self._queue_profiles(rows)
+
+    def _requeue(self, batch: Dict[Tuple[int, str, str], datetime]):
+        """Queue a batch that failed to write again, dropping rows out of attempts"""
+        for key, created_at in batch.items():
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts >= self.max_attempts:
+                self._attempts.pop(key, None)
+                self._dropped += 1
+                continue
+            self._attempts[key] = attempts
+            self._pending.setdefault(key, created_at)
+            self._pending_ids.setdefault(key[0], set()).add(key[1])
+
+    def _queue_profiles(self, rows: List[Dict]):
+        """Hand written rows to the profile task, starting it if it is idle"""
+        self._profile_rows.extend(row for row in rows if row["interaction_type"] in SIGNAL_WEIGHTS)
+        if self._profile_rows and (self._profile_task is None or self._profile_task.done()):
+            self._profile_task = asyncio.create_task(self._drain_profiles())
+
+    async def _drain_profiles(self):
+        while self._profile_rows:
+            rows, self._profile_rows = self._profile_rows, []
+            try:
+                await self._update_profiles(rows)
+            except Exception as e:
+                # Profiles are best effort; they can always be rebuilt from history
+                self._profile_errors += 1
+                print(f"Error updating interest profiles: {e}")
+
+    async def _update_profiles(self, rows: List[Dict]):
+        arxiv_ids = list({row["arxiv_id"] for row in rows})
+        papers = await asyncio.to_thread(self._catalog_papers, arxiv_ids)
+
+        # Papers the user swiped on from arXiv results are usually still cached
+        missing = [arxiv_id for arxiv_id in arxiv_ids if arxiv_id not in papers]
+        uncataloged = arxiv_client.cached_papers(missing) if missing else {}
+        papers.update(uncataloged)
+
+        signals = [
+            (row["user_id"], papers[row["arxiv_id"]], row["interaction_type"], row["created_at"])
+            for row in rows
+            if row["arxiv_id"] in papers
+        ]
+        await asyncio.to_thread(self._write_profiles, signals, list(uncataloged.values()))
+
+    @staticmethod
+    def _catalog_papers(arxiv_ids: List[str]) -> Dict[str, Dict]:
+        db = SessionLocal()
+        try:
+            return get_catalog_papers(db, arxiv_ids)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write_profiles(signals: List[Tuple], uncataloged: List[Dict]):
+        db = SessionLocal()
+        try:
+            # Store the text so rebuild_profile sees the same signals later
+            for paper in uncataloged:
+                get_or_create_paper(db, paper)
+            update_profiles(db, signals)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write_each(rows: List[Dict]) -> Set[int]:
+        """
+        Insert rows one at a time, each in its own savepoint, and return the
+        indexes of those that failed. Raises if none could be written, or
+        the database itself is unavailable.
+        """
+        db = SessionLocal()
+        try:
+            failed = set()
+            error = None
+            for index, row in enumerate(rows):
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(PaperInteraction), [row])
+                except OperationalError:
+                    raise
+                except SQLAlchemyError as e:
+                    failed.add(index)
+                    error = e
+            if len(failed) == len(rows):
+                raise error
+            db.commit()
+            return failed
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write(rows: List[Dict]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(PaperInteraction), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush loop (called on app startup)"""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flush loop and drain pending rows (called on app shutdown)"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        await self.flush()
+        if self._profile_task is not None:
+            await self._profile_task
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "profile_pending": len(self._profile_rows),
+            "queued": self._queued,
+            "coalesced": self._coalesced,
+            "written": self._written,
+            "flushes": self._flushes,
+            "errors": self._errors,
+            "dropped": self._dropped,
+            "profile_errors": self._profile_errors
+        }
+
+
+# Singleton instance
+interaction_buffer = InteractionBuffer()
+
+
+def get_seen_ids(db: Session, user_id: int, arxiv_ids: List[str]) -> Set[str]:
+    """
+    Return which of the candidate papers the user has already interacted
+    with. Only the candidates are looked up, so the cost depends on the page
+    size rather than the user's whole history. Any version of a paper
+    counts, so a revision of a swiped paper isn't shown again. Interactions
+    still waiting in the write-behind buffer count as seen.
+    """
+    if not arxiv_ids:
+        return set()
+
+    bases = {arxiv_id: strip_version(arxiv_id) for arxiv_id in set(arxiv_ids)}
+    seen_bases = {strip_version(arxiv_id) for arxiv_id in interaction_buffer.pending_ids(user_id)}
+
+    unknown = set(bases.values()) - seen_bases
+    if unknown:
+        # The base ID itself, or any "<base>v<n>"
+        rows = db.query(PaperInteraction.arxiv_id).filter(
+            PaperInteraction.user_id == user_id,
+            or_(
+                PaperInteraction.arxiv_id.in_(unknown),
+                *(
+                    and_(PaperInteraction.arxiv_id >= f"{base_id}v", PaperInteraction.arxiv_id < f"{base_id}w")
+                    for base_id in unknown
+                )
+            )
+        ).distinct().all()
+        seen_bases.update(strip_version(row.arxiv_id) for row in rows)
+
+    return {arxiv_id for arxiv_id, base_id in bases.items() if base_id in seen_bases}
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from ..config import settings
+from .security import get_password_hash, verify_password
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHasher:
+    """
+    Bounded worker pool for bcrypt, so hashing never blocks the event loop.
+
+    bcrypt releases the GIL while it works, so a thread pool hashes on every
+    core without the start-up and pickling cost of processes. At most
+    `workers` hashes run at once and up to `max_queue` more wait for a
+    worker; past that, calls fail fast with PasswordHasherBusy instead of
+    letting a burst of logins queue up behind each other.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+
+        # Stats
+        self._hashed = 0
+        self._verified = 0
+        self._rejected = 0
+        self._total_time = 0.0
+        self._max_time = 0.0
+
+    async def _run(self, fn: Callable, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise PasswordHasherBusy()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+        started = time.monotonic()
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+            elapsed = time.monotonic() - started
+            self._total_time += elapsed
+            self._max_time = max(self._max_time, elapsed)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured BCRYPT_ROUNDS"""
+        hashed = await self._run(get_password_hash, password)
+        self._hashed += 1
+        return hashed
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password against its hash"""
+        matches = await self._run(verify_password, password, hashed_password)
+        self._verified += 1
+        return matches
+
+    async def close(self):
+        """Shut the worker threads down (called on app shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        """Pool size, queue depth and time per call including the wait for a worker"""
+        calls = self._hashed + self._verified
+        return {
+            "rounds": settings.BCRYPT_ROUNDS,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.workers),
+            "hashed": self._hashed,
+            "verified": self._verified,
+            "rejected": self._rejected,
+            "avg_seconds": self._total_time / calls if calls else 0.0,
+            "max_seconds": self._max_time
+        }
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
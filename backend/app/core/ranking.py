@@ -0,0 +1,305 @@
+import re
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import Paper, PaperInteraction, SavedPaper, UserProfile
+from ..utils import as_utc
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a about above after again all also an and any are as at be because been being
+both but by can could did do does doing down during each few for from further
+had has have having here how however i if in into is it its itself more most
+no nor not of off on once only or other our out over own same should so some
+such than that the their them then there these they this those through to too
+under until up very was we were what when where which while who whom why will
+with would you your via using use used based show shows propose proposed paper
+approach method methods results new
+""".split())
+
+# How far each kind of signal pulls the profile towards (or away from) a paper
+SIGNAL_WEIGHTS = {"like": 1.0, "save": 1.0, "dislike": -0.5}
+
+
+@lru_cache(maxsize=200000)
+def _feature(token: str) -> int:
+    """
+    Stable signed hash feature for a token: column * 2 + sign bit, or -1
+    for stopwords. Stable across processes, so vectors can be persisted.
+    """
+    if token in _STOPWORDS:
+        return -1
+    h = zlib.crc32(token.encode("utf-8"))
+    return (h % settings.RANKING_DIM) * 2 + (h >> 31)
+
+
+def _paper_text(paper: Dict) -> str:
+    # Titles are short but informative, so count them twice
+    return f"{paper.get('title', '')} {paper.get('title', '')} {paper.get('abstract', '')}"
+
+
+def _sparse_row(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed, sublinear term frequencies of one text as L2-normalized (columns, values)"""
+    features = np.array(
+        [_feature(token) for token in _TOKEN_RE.findall(text.lower())],
+        dtype=np.int64
+    )
+    features = features[features >= 0]
+    if not len(features):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    # Colliding features with opposite signs share a column and partly cancel
+    keys, counts = np.unique(features, return_counts=True)
+    signs = np.where(keys & 1, 1.0, -1.0)
+    columns, inverse = np.unique(keys >> 1, return_inverse=True)
+    values = np.bincount(inverse, weights=signs * (1.0 + np.log(counts))).astype(np.float32)
+
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        values /= norm
+    return columns, values
+
+
+def _dense(rows: List[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    dim = settings.RANKING_DIM
+    matrix = np.zeros((len(rows), dim), dtype=np.float32)
+    for i, (columns, values) in enumerate(rows):
+        matrix[i, columns] = values
+    return matrix
+
+
+def tf_matrix(texts: List[str]) -> np.ndarray:
+    """
+    Hashed, sublinear term-frequency vectors (one L2-normalized float32 row
+    per text). The hashing is stable across processes, so vectors can be
+    stored and compared later.
+    """
+    return _dense([_sparse_row(text) for text in texts])
+
+
+class _RowCache:
+    """LRU of sparse paper rows keyed by arXiv ID and updated date"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._rows: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+    def get(self, paper: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        key = (paper.get("arxiv_id") or "", paper.get("updated_date") or "")
+        row = self._rows.get(key)
+        if row is None:
+            row = _sparse_row(_paper_text(paper))
+            if key[0]:
+                self._rows[key] = row
+                while len(self._rows) > self.max_entries:
+                    self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(key)
+        return row
+
+
+_row_cache = _RowCache(settings.RANKING_ROW_CACHE_SIZE)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _decay(seconds: float) -> float:
+    return 0.5 ** (seconds / (settings.RANKING_HALF_LIFE_DAYS * 86400))
+
+
+def _stored_vector(profile: Optional[UserProfile]) -> Optional[np.ndarray]:
+    """A writable copy of the stored vector, or None if the profile needs a (re)build"""
+    if profile is None:
+        return None
+    if not profile.vector:
+        return np.zeros(settings.RANKING_DIM, dtype=np.float32)
+    vector = np.frombuffer(profile.vector, dtype=np.float32)
+    # A different RANKING_DIM makes the stored vector meaningless
+    return vector.copy() if vector.size == settings.RANKING_DIM else None
+
+
+def _apply_signals(profile: UserProfile, vector: np.ndarray, signals: List[Tuple[Dict, str, datetime]]):
+    """
+    Fold signals into the profile. The stored vector is anchored at the
+    newest signal: moving forward in time decays the whole vector once,
+    while a late-arriving older signal is decayed on its own.
+    """
+    signal_at = as_utc(profile.signal_at) if profile.signal_at else None
+
+    for paper, interaction_type, created_at in sorted(signals, key=lambda signal: as_utc(signal[2])):
+        weight = SIGNAL_WEIGHTS.get(interaction_type)
+        columns, values = _row_cache.get(paper)
+        if weight is None or not len(columns):
+            continue
+
+        created_at = as_utc(created_at)
+        if signal_at is None or created_at >= signal_at:
+            if signal_at is not None:
+                vector *= _decay((created_at - signal_at).total_seconds())
+            signal_at = created_at
+        else:
+            weight *= _decay((signal_at - created_at).total_seconds())
+
+        vector[columns] += weight * values
+        profile.signal_count = (profile.signal_count or 0) + 1
+
+    profile.vector = vector.tobytes() if profile.signal_count else b""
+    profile.signal_at = signal_at
+
+
+def rebuild_profile(db: Session, user_id: int, profile: Optional[UserProfile] = None) -> UserProfile:
+    """
+    Build a profile from the user's recent history (saved papers plus
+    liked, disliked and saved catalog papers). Used once per user to
+    backfill existing accounts, or after RANKING_DIM changes. The caller
+    commits.
+    """
+    limit = settings.RANKING_PROFILE_SIZE
+    signals = []
+
+    saved = db.query(
+        Paper.arxiv_id, Paper.title, Paper.abstract, Paper.updated_date, SavedPaper.saved_at
+    ).join(
+        SavedPaper, SavedPaper.paper_id == Paper.id
+    ).filter(
+        SavedPaper.user_id == user_id
+    ).order_by(SavedPaper.saved_at.desc()).limit(limit).all()
+    signals.extend(
+        (
+            {
+                "arxiv_id": row.arxiv_id,
+                "title": row.title,
+                "abstract": row.abstract,
+                "updated_date": row.updated_date
+            },
+            "save",
+            row.saved_at
+        )
+        for row in saved
+    )
+
+    interactions = db.query(
+        Paper.arxiv_id, Paper.title, Paper.abstract, Paper.updated_date,
+        PaperInteraction.interaction_type, PaperInteraction.created_at
+    ).join(
+        PaperInteraction, PaperInteraction.arxiv_id == Paper.arxiv_id
+    ).filter(
+        PaperInteraction.user_id == user_id,
+        PaperInteraction.interaction_type.in_(list(SIGNAL_WEIGHTS))
+    ).order_by(PaperInteraction.created_at.desc()).limit(limit).all()
+    signals.extend(
+        (
+            {
+                "arxiv_id": row.arxiv_id,
+                "title": row.title,
+                "abstract": row.abstract,
+                "updated_date": row.updated_date
+            },
+            row.interaction_type,
+            row.created_at
+        )
+        for row in interactions
+    )
+
+    if profile is None:
+        profile = UserProfile(user_id=user_id)
+        db.add(profile)
+    profile.signal_count = 0
+    profile.signal_at = None
+
+    _apply_signals(
+        profile,
+        np.zeros(settings.RANKING_DIM, dtype=np.float32),
+        [signal for signal in signals if signal[2] is not None]
+    )
+    return profile
+
+
+def update_profiles(db: Session, signals: List[Tuple[int, Dict, str, datetime]]):
+    """
+    Apply new (user_id, paper, interaction_type, created_at) signals to the
+    stored profiles and commit. The signals must already be persisted:
+    users without a profile yet are rebuilt from history, which has them.
+    """
+    by_user: Dict[int, List[Tuple[Dict, str, datetime]]] = {}
+    for user_id, paper, interaction_type, created_at in signals:
+        if interaction_type in SIGNAL_WEIGHTS:
+            by_user.setdefault(user_id, []).append((paper, interaction_type, created_at))
+    if not by_user:
+        return
+
+    profiles = {
+        profile.user_id: profile
+        for profile in db.query(UserProfile).filter(
+            UserProfile.user_id.in_(list(by_user))
+        ).with_for_update().all()
+    }
+
+    for user_id, user_signals in by_user.items():
+        profile = profiles.get(user_id)
+        vector = _stored_vector(profile)
+        if vector is None:
+            rebuild_profile(db, user_id, profile)
+        else:
+            _apply_signals(profile, vector, user_signals)
+
+    db.commit()
+
+
+def load_profile(db: Session, user_id: int) -> Optional[np.ndarray]:
+    """
+    The user's normalized profile vector, or None without any signals.
+    One primary-key lookup; history is only replayed the first time.
+    """
+    profile = db.get(UserProfile, user_id)
+    vector = _stored_vector(profile)
+    if vector is None:
+        profile = rebuild_profile(db, user_id, profile)
+        vector = _stored_vector(profile)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request built it at the same time
+            db.rollback()
+
+    return _normalize(vector) if np.any(vector) else None
+
+
+def rerank(papers: List[Dict], profile: Optional[np.ndarray]) -> List[Dict]:
+    """
+    Reorder candidates by similarity to the user's profile, blended with
+    their original rank so upstream relevance still counts.
+
+    Candidate term weights get an IDF computed over the page itself, and
+    the whole page is scored with a single matrix-vector product.
+    """
+    if profile is None or len(papers) < 2:
+        return papers
+
+    # Candidate pages recur (result cache, decks), so paper rows are cached
+    candidates = _dense([_row_cache.get(paper) for paper in papers])
+
+    # IDF over the candidate page, applied to both sides
+    df = np.count_nonzero(candidates, axis=0)
+    idf = (np.log((1 + len(papers)) / (1 + df)) + 1).astype(np.float32)
+    scores = _normalize(candidates * idf) @ _normalize(profile * idf)
+
+    spread = scores.max() - scores.min()
+    similarity = (scores - scores.min()) / spread if spread > 0 else np.zeros_like(scores)
+    position = 1.0 - np.arange(len(papers), dtype=np.float32) / len(papers)
+
+    weight = settings.RANKING_WEIGHT
+    combined = weight * similarity + (1 - weight) * position
+    order = np.argsort(-combined, kind="stable")
+    return [papers[i] for i in order]
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Dict
+from ..config import settings
+
+
+class RateLimiter:
+    """
+    Token bucket that spaces outgoing calls to an upstream API.
+
+    Callers queue on a FIFO lock, so concurrent requests are served in
+    arrival order and each one only waits until its own slot opens up.
+    """
+
+    def __init__(self, interval: float, burst: int = 1):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        # Stats
+        self._waiting = 0
+        self._acquired = 0
+        self._throttled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.interval <= 0:
+            self._tokens = float(self.burst)
+        else:
+            elapsed = now - self._last_refill
+            self._tokens = min(self.burst, self._tokens + elapsed / self.interval)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait until a request may be sent upstream"""
+        queued_at = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) * self.interval)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - queued_at
+        self._acquired += 1
+        self._total_wait += waited
+        self._last_wait = waited
+        self._max_wait = max(self._max_wait, waited)
+        if waited > 0.001:
+            self._throttled += 1
+
+    def stats(self) -> Dict:
+        """Queue depth and wait times, to see when the limit is binding"""
+        return {
+            "interval_seconds": self.interval,
+            "burst": self.burst,
+            "queue_depth": self._waiting,
+            "acquired": self._acquired,
+            "throttled": self._throttled,
+            "avg_wait_seconds": self._total_wait / self._acquired if self._acquired else 0.0,
+            "max_wait_seconds": self._max_wait,
+            "last_wait_seconds": self._last_wait
+        }
+
+
+# Singleton shared by every arXiv call in this process
+arxiv_rate_limiter = RateLimiter(
+    interval=settings.ARXIV_RATE_LIMIT_DELAY,
+    burst=settings.ARXIV_RATE_LIMIT_BURST
+)
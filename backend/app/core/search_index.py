@@ -0,0 +1,122 @@
+import re
+from typing import Optional
+from sqlalchemy import text, func, literal_column, table, column
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+from ..models import Paper
+
+# Dialects whose full-text index was created successfully
+_indexed_dialects = set()
+
+papers_fts = table("papers_fts", column("rowid"))
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+        title, abstract,
+        content='papers', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS papers_fts_ai AFTER INSERT ON papers BEGIN
+        INSERT INTO papers_fts(rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS papers_fts_ad AFTER DELETE ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS papers_fts_au AFTER UPDATE OF title, abstract ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+        INSERT INTO papers_fts(rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+    END
+    """
+]
+
+_POSTGRES_DDL = [
+    """
+    ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(abstract, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_papers_search_vector ON papers USING GIN (search_vector)"
+]
+
+
+def init_search_index(engine: Engine):
+    """
+    Create the full-text index over paper titles and abstracts.
+
+    SQLite uses an external-content FTS5 table kept in sync by triggers;
+    Postgres uses a generated tsvector column with a GIN index. Both are
+    maintained by the database on every insert/update, so upserts from the
+    harvester stay searchable without extra work. Safe to call repeatedly.
+    """
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                existed = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'papers_fts'"
+                )).first() is not None
+                for statement in _SQLITE_DDL:
+                    conn.execute(text(statement))
+                if not existed:
+                    # Index rows that were stored before the FTS table existed
+                    conn.execute(text("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')"))
+            elif dialect == "postgresql":
+                for statement in _POSTGRES_DDL:
+                    conn.execute(text(statement))
+            else:
+                return
+    except Exception as e:
+        print(f"Full-text search index unavailable, falling back to LIKE search: {e}")
+        return
+
+    _indexed_dialects.add(dialect)
+
+
+def _fts5_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query (all terms must match)"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def apply_fulltext(db: Session, q: Query, query: str, rank: bool) -> Query:
+    """
+    Restrict a Paper query to rows matching `query`, ordered by relevance
+    when `rank` is set. Falls back to LIKE when no index is available.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite" and dialect in _indexed_dialects:
+        match = _fts5_query(query)
+        if match is None:
+            return q
+        q = q.join(papers_fts, papers_fts.c.rowid == Paper.id).filter(text("papers_fts MATCH :fts_query").bindparams(fts_query=match))
+        if rank:
+            # Title matches weigh twice as much as abstract matches
+            q = q.order_by(text("bm25(papers_fts, 2.0, 1.0)"))
+        return q
+
+    if dialect == "postgresql" and dialect in _indexed_dialects:
+        search_vector = literal_column("papers.search_vector")
+        ts_query = func.websearch_to_tsquery("english", query)
+        q = q.filter(search_vector.op("@@")(ts_query))
+        if rank:
+            q = q.order_by(func.ts_rank_cd(search_vector, ts_query).desc())
+        return q
+
+    for term in query.split():
+        pattern = f"%{term}%"
+        q = q.filter(Paper.title.ilike(pattern) | Paper.abstract.ilike(pattern))
+    if rank:
+        q = q.order_by(Paper.updated_date.desc())
+    return q
@@ -13,14 +13,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password (cost BCRYPT_ROUNDS unless given)"""
     return bcrypt.hashpw(
         password.encode('utf-8'),
-        bcrypt.gensalt()
+        bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     ).decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        # $2b$<rounds>$<salt and digest>
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
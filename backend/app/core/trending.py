@@ -0,0 +1,236 @@
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, desc, func, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Paper, PaperSaveBucket, SavedPaper
+from ..utils import as_utc
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _day(value: Optional[datetime]) -> date:
+    if value is None:
+        return _today()
+    return as_utc(value).date()
+
+
+def _oldest_day() -> date:
+    return _today() - timedelta(days=settings.TRENDING_MAX_DAYS - 1)
+
+
+def record_save(db: Session, paper_id: int, saved_at: Optional[datetime] = None, delta: int = 1):
+    """
+    Count a public save (or, with a negative delta, its removal) in the
+    paper's bucket for the day it was saved. Runs in the caller's
+    transaction, so the bucket commits together with the save itself.
+    """
+    day = _day(saved_at)
+    if day < _oldest_day():
+        # Outside every window
+        return
+
+    if delta < 0:
+        db.query(PaperSaveBucket).filter(
+            PaperSaveBucket.paper_id == paper_id,
+            PaperSaveBucket.day == day
+        ).update({PaperSaveBucket.saves: PaperSaveBucket.saves + delta}, synchronize_session=False)
+        return
+
+    values = {"paper_id": paper_id, "day": day, "saves": delta}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        upsert = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(PaperSaveBucket).values(**values)
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=["paper_id", "day"],
+            set_={"saves": PaperSaveBucket.saves + delta}
+        ))
+        return
+
+    updated = db.query(PaperSaveBucket).filter(
+        PaperSaveBucket.paper_id == paper_id,
+        PaperSaveBucket.day == day
+    ).update({PaperSaveBucket.saves: PaperSaveBucket.saves + delta}, synchronize_session=False)
+    if not updated:
+        db.add(PaperSaveBucket(**values))
+
+
+def rebuild_save_buckets(db: Session) -> int:
+    """
+    Recount the daily buckets from saved_papers (backfill, or repairing
+    drift). Only saves inside the longest window are read. Commits and
+    returns the number of buckets written.
+    """
+    oldest = _oldest_day()
+    counts: Dict[Tuple[int, date], int] = {}
+    rows = db.query(SavedPaper.paper_id, SavedPaper.saved_at).filter(
+        SavedPaper.is_public == 1,
+        SavedPaper.saved_at >= datetime.combine(oldest, datetime.min.time(), tzinfo=timezone.utc)
+    )
+    for paper_id, saved_at in rows:
+        key = (paper_id, _day(saved_at))
+        if key[1] >= oldest:
+            counts[key] = counts.get(key, 0) + 1
+
+    db.execute(delete(PaperSaveBucket))
+    if counts:
+        db.execute(insert(PaperSaveBucket), [
+            {"paper_id": paper_id, "day": day, "saves": saves}
+            for (paper_id, day), saves in counts.items()
+        ])
+    db.commit()
+    return len(counts)
+
+
+class TrendingLeaderboard:
+    """
+    Cached top-N trending papers for each look-back window.
+
+    Saves are counted into per-paper daily buckets as they happen (see
+    record_save), so a window of `days` is a sum over at most that many
+    buckets. The top TRENDING_TOP_N papers of every window that has been
+    asked for are recomputed in the background every
+    TRENDING_REFRESH_SECONDS; requests only slice the cached list.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.top_n = settings.TRENDING_TOP_N
+        self.refresh_interval = settings.TRENDING_REFRESH_SECONDS
+        self._windows: Dict[int, List[Dict]] = {}
+        self._refreshed_at: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._errors = 0
+
+    def compute(self, db: Session, days: int) -> List[Dict]:
+        """Top papers by public saves over the last `days` days (today included)"""
+        cutoff = _today() - timedelta(days=days - 1)
+        window_saves = func.sum(PaperSaveBucket.saves).label("recent_saves")
+        top = db.query(PaperSaveBucket.paper_id, window_saves).filter(
+            PaperSaveBucket.day >= cutoff
+        ).group_by(
+            PaperSaveBucket.paper_id
+        ).having(
+            window_saves > 0
+        ).order_by(
+            desc("recent_saves"), PaperSaveBucket.paper_id.desc()
+        ).limit(self.top_n).all()
+        if not top:
+            return []
+
+        paper_ids = [paper_id for paper_id, _ in top]
+        papers = {paper.id: paper for paper in db.query(Paper).filter(Paper.id.in_(paper_ids))}
+        totals = dict(db.query(SavedPaper.paper_id, func.count(SavedPaper.id)).filter(
+            SavedPaper.paper_id.in_(paper_ids),
+            SavedPaper.is_public == 1
+        ).group_by(SavedPaper.paper_id).all())
+
+        result = []
+        for paper_id, recent_saves in top:
+            paper = papers.get(paper_id)
+            if paper is None:
+                continue
+            result.append({
+                "arxiv_id": paper.arxiv_id,
+                "title": paper.title,
+                "authors": paper.authors,
+                "abstract": paper.abstract,
+                "categories": paper.categories,
+                "published_date": paper.published_date,
+                "pdf_url": paper.pdf_url,
+                "source_url": paper.source_url,
+                "save_count": totals.get(paper_id, recent_saves),
+                "recent_saves": recent_saves
+            })
+        return result
+
+    def get(self, db: Session, days: int, limit: int) -> List[Dict]:
+        """Serve a window from the cache, computing it on first use"""
+        papers = self._windows.get(days)
+        if papers is None:
+            self._misses += 1
+            papers = self.compute(db, days)
+            self._windows[days] = papers
+            self._refreshed_at[days] = time.monotonic()
+        else:
+            self._hits += 1
+        return [dict(paper) for paper in papers[:limit]]
+
+    def _refresh(self):
+        db = self.session_factory()
+        try:
+            # Drop buckets that have aged out of every window
+            db.execute(delete(PaperSaveBucket).where(PaperSaveBucket.day < _oldest_day()))
+            db.commit()
+            for days in list(self._windows):
+                self._windows[days] = self.compute(db, days)
+                self._refreshed_at[days] = time.monotonic()
+        finally:
+            db.close()
+
+    def _backfill_if_empty(self):
+        db = self.session_factory()
+        try:
+            if db.query(PaperSaveBucket.paper_id).first() is None:
+                rebuild_save_buckets(db)
+        finally:
+            db.close()
+
+    async def run_forever(self):
+        try:
+            await asyncio.to_thread(self._backfill_if_empty)
+        except Exception as e:
+            print(f"Error backfilling trending buckets: {e}")
+
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self._refresh)
+                self._refreshes += 1
+            except Exception as e:
+                self._errors += 1
+                print(f"Error refreshing trending papers: {e}")
+
+    def start(self):
+        """Start the periodic refresh loop (called on app startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Cancel the refresh loop (called on app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "windows": sorted(self._windows),
+            "oldest_refresh_seconds": round(max(
+                (now - refreshed_at for refreshed_at in self._refreshed_at.values()), default=0
+            ), 1),
+            "hits": self._hits,
+            "misses": self._misses,
+            "refreshes": self._refreshes,
+            "errors": self._errors
+        }
+
+
+# Singleton instance
+trending_leaderboard = TrendingLeaderboard()
@@ -1,4 +1,9 @@
-from sqlalchemy import create_engine
+from typing import AsyncIterator, Set
+from sqlalchemy import JSON, create_engine, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -24,13 +29,109 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str) -> str:
+    """The same database through its asyncio driver (aiosqlite or asyncpg)"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url.render_as_string(hide_password=False)
+
+
+# Request handlers use the async engine so queries never block the event
+# loop. Startup migrations, the CLI and the background services (which run
+# their queries in worker threads) keep the sync engine above.
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL),
+    **engine_kwargs
+)
+
+# Objects stay loaded after commit; refreshing them implicitly would need I/O
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+# JSON column type: decoded by the driver, stored as JSONB (indexable) on Postgres
+JSONType = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
 
-def get_db():
-    """Dependency for getting database session"""
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def create_missing_indexes():
+    """
+    Create indexes declared on models that predate them. create_all only
+    builds indexes together with new tables.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def create_missing_columns() -> Set[str]:
+    """
+    Add columns declared on models that existing tables predate, like
+    create_missing_indexes does for indexes. Only columns that are nullable
+    or have a server default can be added this way. Returns the added
+    columns as "table.column".
+    """
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if column.primary_key or (not column.nullable and column.server_default is None):
+                    print(f"Cannot add column {table.name}.{column.name} automatically")
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.add(f"{table.name}.{column.name}")
+    return added
+
+
+def convert_json_columns():
+    """
+    Turn text columns that now hold JSON into JSONB on Postgres. SQLite
+    keeps JSON as text, so existing values already read back correctly.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.type is not JSONType or column.name not in existing:
+                    continue
+                if not isinstance(existing[column.name], JSONB):
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                        f"TYPE JSONB USING {column.name}::jsonb"
+                    ))
+
+
+def pad_sqlite_timestamps(table: str, column: str):
+    """
+    SQLite's CURRENT_TIMESTAMP stores whole seconds ("2024-01-01 12:00:00")
+    while SQLAlchemy writes and binds microseconds. The strings then don't
+    compare correctly, which breaks keyset cursors, so pad the old values.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19"
+        ))
@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+from .database import engine, Base
+from .core import arxiv_client, arxiv_harvester, init_search_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harvest arXiv listings into the local paper catalog")
+    parser.add_argument("--fixture", help="Ingest a recorded Atom response instead of calling arXiv")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    init_search_index(engine)
+
+    if args.fixture:
+        with open(args.fixture, encoding="utf-8") as f:
+            print(arxiv_harvester.ingest_feed(f.read()))
+        return
+
+    async def harvest():
+        try:
+            print(await arxiv_harvester.harvest_once())
+        finally:
+            await arxiv_client.close()
+
+    asyncio.run(harvest())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import inspect
 from .config import settings
-from .database import engine, Base
+from .database import (
+    engine,
+    async_engine,
+    Base,
+    SessionLocal,
+    create_missing_columns,
+    create_missing_indexes,
+    convert_json_columns,
+    pad_sqlite_timestamps
+)
 from .api import (
     auth_router,
     papers_router,
@@ -9,9 +19,55 @@ from .api import (
     social_router,
     migrate_router
 )
+from .core import (
+    arxiv_client,
+    arxiv_harvester,
+    deck_manager,
+    interaction_buffer,
+    init_search_index,
+    migrate_saved_papers,
+    backfill_harvested,
+    backfill_base_ids,
+    trending_leaderboard,
+    auth_user_cache,
+    export_cache,
+    password_hasher,
+    reconcile_user_counts,
+    rebuild_feed,
+    USER_COUNT_COLUMNS
+)
 
-# Create database tables
+# Create database tables, bring older ones up to date, and the paper full-text index
+new_tables = set(Base.metadata.tables) - set(inspect(engine).get_table_names())
 Base.metadata.create_all(bind=engine)
+convert_json_columns()
+added_columns = create_missing_columns()
+
+if "papers.harvested" in added_columns:
+    # Tell harvested catalog rows apart from papers that were only saved
+    with SessionLocal() as db:
+        backfill_harvested(db)
+
+if "papers.base_id" in added_columns:
+    # Match papers by arXiv ID without the version, merging stored revisions
+    with SessionLocal() as db:
+        backfill_base_ids(db)
+
+# Matches legacy saves against the catalog by base_id, so runs after its backfill
+migrate_saved_papers(engine)
+create_missing_indexes()
+pad_sqlite_timestamps("saved_papers", "saved_at")
+init_search_index(engine)
+
+if added_columns & USER_COUNT_COLUMNS:
+    # Fill in the new counters for existing users
+    with SessionLocal() as db:
+        reconcile_user_counts(db)
+
+if "feed_items" in new_tables:
+    # Fill timelines from existing follows and saves
+    with SessionLocal() as db:
+        rebuild_feed(db)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,6 +85,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -39,6 +96,28 @@ app.include_router(social_router, prefix="/api")
 app.include_router(migrate_router, prefix="/api")
 
 
+@app.on_event("startup")
+async def startup():
+    """Open long-lived upstream connections and start background tasks"""
+    await arxiv_client.start()
+    interaction_buffer.start()
+    trending_leaderboard.start()
+    if settings.HARVEST_ENABLED:
+        arxiv_harvester.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Drain buffered writes, stop background tasks and close connections"""
+    await interaction_buffer.close()
+    await arxiv_harvester.stop()
+    await trending_leaderboard.stop()
+    await deck_manager.close()
+    await arxiv_client.close()
+    await password_hasher.close()
+    await async_engine.dispose()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -53,3 +132,20 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for upstream connections"""
+    return {
+        "arxiv_pool": arxiv_client.pool_stats(),
+        "arxiv_rate_limit": arxiv_client.rate_limiter.stats(),
+        "arxiv_cache": arxiv_client.cache_stats(),
+        "harvester": arxiv_harvester.stats(),
+        "decks": deck_manager.stats(),
+        "interaction_buffer": interaction_buffer.stats(),
+        "trending": trending_leaderboard.stats(),
+        "auth_user_cache": auth_user_cache.stats(),
+        "export_cache": export_cache.stats(),
+        "password_hasher": password_hasher.stats()
+    }
@@ -1,12 +1,16 @@
-from .user import User
-from .paper import SavedPaper, Tag, PaperInteraction, saved_paper_tags
-from .social import Follow
+from .user import User, UserProfile
+from .paper import Paper, SavedPaper, PaperSaveBucket, Tag, PaperInteraction, saved_paper_tags
+from .social import Follow, FeedEntry
 
 __all__ = [
     "User",
+    "UserProfile",
+    "Paper",
     "SavedPaper",
+    "PaperSaveBucket",
     "Tag",
     "PaperInteraction",
     "Follow",
+    "FeedEntry",
     "saved_paper_tags"
 ]
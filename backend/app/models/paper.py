@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from datetime import datetime, timezone
+from sqlalchemy import Boolean, Column, Integer, String, Text, Date, DateTime, ForeignKey, Table, Index, false
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, JSONType
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 # Association table for many-to-many relationship between SavedPaper and Tag
@@ -13,21 +19,48 @@ saved_paper_tags = Table(
 )
 
 
-class SavedPaper(Base):
-    __tablename__ = "saved_papers"
+class Paper(Base):
+    """
+    Shared arXiv paper metadata: the harvested catalog, plus every paper a
+    user has saved (with metadata looked up on arXiv). Kept current by the
+    harvester. Only harvested rows are served as search results or catalog
+    lookups.
+    """
+    __tablename__ = "papers"
+    __table_args__ = (
+        # Serves category containment (categories @> '["cs.AI"]') on Postgres
+        Index('ix_papers_categories', 'categories', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-
-    # Paper metadata (from arXiv)
-    arxiv_id = Column(String(100), nullable=False, index=True)
+    arxiv_id = Column(String(100), nullable=False, unique=True, index=True)  # Newest version seen
+    base_id = Column(String(100), nullable=True, unique=True, index=True)  # arxiv_id without the version
     title = Column(Text, nullable=False)
-    authors = Column(Text, nullable=False)  # JSON string array
+    authors = Column(JSONType, nullable=False)  # list of names
     abstract = Column(Text, nullable=False)
-    categories = Column(Text, nullable=False)  # JSON string array
-    published_date = Column(String(50), nullable=False)
+    categories = Column(JSONType, nullable=False)  # list of arXiv categories
+    published_date = Column(String(50), nullable=False, index=True)
+    updated_date = Column(String(50), nullable=False, index=True)
     pdf_url = Column(String(500), nullable=True)
     source_url = Column(String(500), nullable=False)
+    # Set only by the harvester (upsert_papers); saved papers alone don't make a catalog
+    harvested = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    # Timestamps
+    harvested_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class SavedPaper(Base):
+    __tablename__ = "saved_papers"
+    __table_args__ = (
+        Index('ix_saved_papers_user_paper', 'user_id', 'paper_id'),
+        Index('ix_saved_papers_user_saved', 'user_id', 'saved_at', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    paper_id = Column(Integer, ForeignKey("papers.id"), nullable=False, index=True)
 
     # User additions
     notes = Column(Text, nullable=True)
@@ -37,13 +70,37 @@ class SavedPaper(Base):
     is_public = Column(Integer, default=1)  # 1 for public, 0 for private
 
     # Timestamps
-    saved_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python so SQLite stores microseconds too; feed cursors compare saved_at exactly
+    saved_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="saved_papers")
+    paper = relationship("Paper", lazy="joined", innerjoin=True)
     tags = relationship("Tag", secondary=saved_paper_tags, back_populates="papers")
 
+    # Paper metadata (from arXiv) lives in the shared papers table
+    arxiv_id = association_proxy("paper", "arxiv_id")
+    title = association_proxy("paper", "title")
+    authors = association_proxy("paper", "authors")
+    abstract = association_proxy("paper", "abstract")
+    categories = association_proxy("paper", "categories")
+    published_date = association_proxy("paper", "published_date")
+    pdf_url = association_proxy("paper", "pdf_url")
+    source_url = association_proxy("paper", "source_url")
+
+
+class PaperSaveBucket(Base):
+    """Public saves of a paper per UTC day, for the trending leaderboard"""
+    __tablename__ = "paper_save_buckets"
+    __table_args__ = (
+        Index('ix_paper_save_buckets_day', 'day'),
+    )
+
+    paper_id = Column(Integer, ForeignKey("papers.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    saves = Column(Integer, nullable=False, default=0)
+
 
 class Tag(Base):
     __tablename__ = "tags"
@@ -67,3 +124,8 @@ class PaperInteraction(Base):
     arxiv_id = Column(String(100), nullable=False, index=True)
     interaction_type = Column(String(20), nullable=False)  # 'view', 'like', 'dislike', 'save'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Seen-paper checks look up a page of candidate ids for one user
+    __table_args__ = (
+        Index('ix_paper_interactions_user_arxiv', 'user_id', 'arxiv_id'),
+    )
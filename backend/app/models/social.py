@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -15,8 +15,32 @@ class Follow(Base):
     # Ensure unique follower-following pairs
     __table_args__ = (
         UniqueConstraint('follower_id', 'following_id', name='unique_follow'),
+        Index('ix_follows_following_id', 'following_id'),
     )
 
     # Relationships
     follower = relationship("User", foreign_keys=[follower_id], back_populates="following")
     following = relationship("User", foreign_keys=[following_id], back_populates="followers")
+
+
+class FeedEntry(Base):
+    """
+    One item in a user's activity timeline: a public save by someone they
+    follow, written when the save happens (fan-out on write)
+    """
+    __tablename__ = "feed_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)  # Timeline owner
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)  # Who saved the paper
+    saved_paper_id = Column(Integer, ForeignKey("saved_papers.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)  # When the paper was saved
+
+    __table_args__ = (
+        Index('ix_feed_items_timeline', 'user_id', 'created_at', 'saved_paper_id'),
+        Index('ix_feed_items_user_actor', 'user_id', 'actor_id'),
+    )
+
+    # Relationships
+    actor = relationship("User", foreign_keys=[actor_id])
+    saved_paper = relationship("SavedPaper")
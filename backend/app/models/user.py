@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, LargeBinary, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, JSONType
 
 
 class User(Base):
@@ -12,9 +12,17 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=True)
     bio = Column(Text, nullable=True)
-    research_interests = Column(Text, nullable=True)  # JSON string of interests
+    research_interests = Column(JSONType, nullable=True)  # list of interests
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+
+    # Denormalized counts, updated in the same transaction as the follow or save
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    saved_papers_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Bumped on every change to the user's saved papers or tags; versions cached exports
+    library_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -32,3 +40,17 @@ class User(Base):
         back_populates="follower",
         cascade="all, delete-orphan"
     )
+    profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
+
+
+class UserProfile(Base):
+    """Interest profile vector, updated incrementally as the user swipes and saves"""
+    __tablename__ = "user_profiles"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    vector = Column(LargeBinary, nullable=False, default=b"")  # Raw float32 array, empty when no signals yet
+    signal_count = Column(Integer, nullable=False, default=0)
+    signal_at = Column(DateTime(timezone=True), nullable=True)  # Time of the newest signal; older ones decay from here
+
+    # Relationships
+    user = relationship("User", back_populates="profile")
@@ -0,0 +1,21 @@
+import argparse
+from .database import SessionLocal
+from .core import reconcile_user_counts, rebuild_save_buckets, rebuild_feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repair denormalized counters from the source tables")
+    parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Users with repaired counts: {reconcile_user_counts(db)}")
+        print(f"Trending buckets rebuilt: {rebuild_save_buckets(db)}")
+        # Timelines depend on follower counts, so they go last
+        print(f"Feed items rebuilt: {rebuild_feed(db)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from .paper import (
     TagCreate,
     TagResponse,
     PaperInteractionCreate,
+    PaperInteractionBatch,
     SearchFilters,
     MigrationData
 )
@@ -29,6 +30,7 @@ __all__ = [
     "TagCreate",
     "TagResponse",
     "PaperInteractionCreate",
+    "PaperInteractionBatch",
     "SearchFilters",
     "MigrationData",
     "FollowResponse",
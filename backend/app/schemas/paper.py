@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Literal, Optional, List
 from datetime import datetime
 
 
@@ -76,8 +76,12 @@ class TagResponse(BaseModel):
 
 
 class PaperInteractionCreate(BaseModel):
-    arxiv_id: str
-    interaction_type: str  # 'view', 'like', 'dislike', 'save'
+    arxiv_id: str = Field(..., min_length=1, max_length=100)
+    interaction_type: Literal['view', 'like', 'dislike', 'save']
+
+
+class PaperInteractionBatch(BaseModel):
+    interactions: List[PaperInteractionCreate] = Field(..., max_length=500)
 
 
 class SearchFilters(BaseModel):
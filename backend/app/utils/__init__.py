@@ -1,7 +1,11 @@
-from .export import export_to_bibtex, export_to_csv, export_to_text
+from .export import export_to_bibtex, export_to_csv, export_to_text, encode_chunks
+from .dates import as_utc, parse_day
 
 __all__ = [
     "export_to_bibtex",
     "export_to_csv",
-    "export_to_text"
+    "export_to_text",
+    "encode_chunks",
+    "as_utc",
+    "parse_day"
 ]
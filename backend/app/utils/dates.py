@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def as_utc(value: datetime) -> datetime:
+    """Make a datetime timezone-aware in UTC"""
+    # SQLite hands back naive datetimes for timezone-aware columns (stored as UTC)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def parse_day(value: Optional[str]) -> Optional[datetime]:
+    """Parse a YYYY-MM-DD filter value, ignoring malformed input"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
@@ -1,14 +1,12 @@
-import json
-from typing import List
+import zlib
+from typing import Iterable, Iterator
 from ..models import SavedPaper
 
 
-def export_to_bibtex(papers: List[SavedPaper]) -> str:
-    """Export papers to BibTeX format"""
-    bibtex_entries = []
-
-    for paper in papers:
-        authors_list = json.loads(paper.authors)
+def export_to_bibtex(papers: Iterable[SavedPaper]) -> Iterator[str]:
+    """Export papers to BibTeX format, one entry at a time"""
+    for i, paper in enumerate(papers):
+        authors_list = paper.authors
         authors_str = " and ".join(authors_list)
 
         # Create citation key from first author and year
@@ -25,38 +23,34 @@ def export_to_bibtex(papers: List[SavedPaper]) -> str:
   archivePrefix = {{arXiv}},
   url = {{{paper.source_url}}}
 }}"""
-        bibtex_entries.append(entry)
-
-    return "\n\n".join(bibtex_entries)
+        yield entry if i == 0 else "\n\n" + entry
 
 
-def export_to_csv(papers: List[SavedPaper]) -> str:
-    """Export papers to CSV format"""
-    csv_lines = ["Title,Authors,Year,arXiv ID,Categories,URL,Notes"]
+def export_to_csv(papers: Iterable[SavedPaper]) -> Iterator[str]:
+    """Export papers to CSV format, one line at a time"""
+    yield "Title,Authors,Year,arXiv ID,Categories,URL,Notes"
 
     for paper in papers:
-        authors_list = json.loads(paper.authors)
+        authors_list = paper.authors
         authors_str = "; ".join(authors_list)
         year = paper.published_date[:4] if paper.published_date else ""
-        categories_list = json.loads(paper.categories)
+        categories_list = paper.categories
         categories_str = "; ".join(categories_list)
         notes = (paper.notes or "").replace('"', '""')  # Escape quotes
 
-        csv_lines.append(
-            f'"{paper.title}","{authors_str}","{year}","{paper.arxiv_id}","{categories_str}","{paper.source_url}","{notes}"'
+        yield (
+            f'\n"{paper.title}","{authors_str}","{year}","{paper.arxiv_id}","{categories_str}","{paper.source_url}","{notes}"'
         )
 
-    return "\n".join(csv_lines)
 
-
-def export_to_text(papers: List[SavedPaper]) -> str:
-    """Export papers to plain text format"""
-    text_entries = []
+def export_to_text(papers: Iterable[SavedPaper]) -> Iterator[str]:
+    """Export papers to plain text format, one entry at a time"""
+    yield "\n" + ("-" * 80)
 
     for i, paper in enumerate(papers, 1):
-        authors_list = json.loads(paper.authors)
+        authors_list = paper.authors
         authors_str = ", ".join(authors_list)
-        categories_list = json.loads(paper.categories)
+        categories_list = paper.categories
         categories_str = ", ".join(categories_list)
 
         entry = f"""[{i}] {paper.title}
@@ -69,6 +63,34 @@ URL: {paper.source_url}
         if paper.notes:
             entry += f"Notes: {paper.notes}\n"
 
-        text_entries.append(entry)
-
-    return "\n" + ("-" * 80) + "\n".join(text_entries)
+        yield entry if i == 1 else "\n" + entry
+
+
+def encode_chunks(parts: Iterable[str], chunk_size: int = 64 * 1024, compress: bool = False) -> Iterator[bytes]:
+    """
+    Join rendered parts into UTF-8 chunks of about chunk_size bytes,
+    gzip-compressed on the fly if asked, so a response can be streamed
+    without holding the whole export in memory.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip container
+    buffer = []
+    size = 0
+
+    for part in parts:
+        data = part.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            chunk = b"".join(buffer)
+            buffer = []
+            size = 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
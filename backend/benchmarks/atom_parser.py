@@ -0,0 +1,145 @@
+"""
+Microbenchmark: streaming Atom parser vs. the previous feedparser-based loop.
+
+    cd backend
+    python -m benchmarks.atom_parser [--entries 100] [--repeat 20] [--feed recorded.xml]
+
+Checks that both parsers produce identical paper dicts, then reports parse
+time and peak traced memory per 100 entries. Requires `feedparser` for the
+baseline (pip install feedparser).
+"""
+import argparse
+import time
+import tracemalloc
+from xml.sax.saxutils import escape
+
+import feedparser
+
+from app.core.atom_parser import iter_papers
+
+ABSTRACT = (
+    "We study the problem of learning representations for scientific documents "
+    "with &lt;b&gt;graph neural networks&lt;/b&gt; &amp; transformers. Our method "
+    "achieves state-of-the-art results on $O(n \\log n)$ retrieval benchmarks, "
+    "improving recall@10 by 12% over strong baselines.\n"
+) * 4
+
+
+def legacy_parse(feed_text: str):
+    """The feedparser loop ArxivClient used before streaming parsing"""
+    feed = feedparser.parse(feed_text)
+
+    papers = []
+    for entry in feed.entries:
+        authors = [author.name for author in entry.get('authors', [])]
+        categories = [tag.term for tag in entry.get('tags', [])]
+        arxiv_id = entry.id.split('/abs/')[-1]
+        published_date = entry.published if hasattr(entry, 'published') else ""
+        updated_date = entry.updated if hasattr(entry, 'updated') else published_date
+        papers.append({
+            "id": arxiv_id,
+            "arxiv_id": arxiv_id,
+            "title": entry.title.replace('\n', ' ').strip(),
+            "authors": authors,
+            "abstract": entry.summary.replace('\n', ' ').strip(),
+            "categories": categories,
+            "publishedDate": published_date,
+            "published_date": published_date,
+            "updated_date": updated_date,
+            "pdfUrl": entry.link.replace('/abs/', '/pdf/') if hasattr(entry, 'link') else None,
+            "pdf_url": entry.link.replace('/abs/', '/pdf/') if hasattr(entry, 'link') else None,
+            "sourceUrl": entry.id,
+            "source_url": entry.id
+        })
+    return papers
+
+
+def streaming_parse(feed_bytes: bytes, chunk_size: int = 16384):
+    chunks = (feed_bytes[i:i + chunk_size] for i in range(0, len(feed_bytes), chunk_size))
+    return list(iter_papers(chunks))
+
+
+def synthetic_feed(entries: int) -> str:
+    """An arXiv-shaped Atom response with `entries` papers"""
+    parts = []
+    for i in range(entries):
+        arxiv_id = f"2401.{i:05d}v1"
+        authors = "".join(
+            f"<author><name>Author {i}-{j} {escape('Müller')}</name>"
+            f"<arxiv:affiliation>University {j}</arxiv:affiliation></author>"
+            for j in range(6)
+        )
+        parts.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}</id>
+    <updated>2024-02-{i % 28 + 1:02d}T18:00:00Z</updated>
+    <published>2024-01-{i % 28 + 1:02d}T18:00:00Z</published>
+    <title>Scalable Retrieval for Paper {i}:
+  A Study of Graph &amp; Sequence Models</title>
+    <summary>  {ABSTRACT}</summary>
+    {authors}
+    <arxiv:comment xmlns:arxiv="http://arxiv.org/schemas/atom">12 pages, 4 figures</arxiv:comment>
+    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.IR" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>""")
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom" '
+        'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">\n'
+        '  <title type="html">ArXiv Query</title>\n'
+        f'  <opensearch:totalResults>{entries}</opensearch:totalResults>'
+        + "".join(parts)
+        + "\n</feed>\n"
+    )
+
+
+def measure(fn, arg, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--feed", help="Recorded arXiv Atom response to use instead of synthetic data")
+    args = parser.parse_args()
+
+    if args.feed:
+        with open(args.feed, encoding="utf-8") as f:
+            feed_text = f.read()
+    else:
+        feed_text = synthetic_feed(args.entries)
+    feed_bytes = feed_text.encode("utf-8")
+
+    legacy = legacy_parse(feed_text)
+    streaming = streaming_parse(feed_bytes)
+    assert legacy == streaming, "streaming parser output differs from feedparser"
+    count = len(streaming)
+    scale = 100 / count if count else 0
+
+    print(f"{count} entries, {len(feed_bytes) / 1024:.0f} KiB, outputs identical")
+    print(f"{'parser':<12}{'ms / 100 entries':>18}{'peak KiB / 100 entries':>26}")
+    for name, fn, arg in (
+        ("feedparser", legacy_parse, feed_text),
+        ("streaming", streaming_parse, feed_bytes),
+    ):
+        seconds, peak = measure(fn, arg, args.repeat)
+        print(f"{name:<12}{seconds * 1000 * scale:>18.2f}{peak / 1024 * scale:>26.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: bcrypt throughput per cost, and event-loop stalls during a login burst.
+
+    cd backend
+    python -m benchmarks.password_hashing [--rounds 10 11 12 13] [--seconds 2] [--workers 0] [--burst 16] [--target-ms 250]
+
+For each cost, reports hashes/sec on one core and through PasswordHasher's
+pool (hashes/sec per core = pool rate / workers), then suggests the highest
+BCRYPT_ROUNDS whose single hash stays under --target-ms. Finally runs a
+burst of hashes inline on the event loop (as the auth endpoints used to)
+and through the pool, reporting how long a 10 ms heartbeat task was
+stalled in each case.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import bcrypt
+
+from app.config import settings
+from app.core.password_hasher import PasswordHasher
+
+PASSWORD = b"correct horse battery staple"
+
+
+def single_core_rate(rounds: int, seconds: float) -> float:
+    salt = bcrypt.gensalt(rounds=rounds)
+    count = 0
+    start = time.perf_counter()
+    while True:
+        bcrypt.hashpw(PASSWORD, salt)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+async def pool_rate(hasher: PasswordHasher, seconds: float) -> float:
+    # Keep every worker busy, one round of hashes at a time
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await asyncio.gather(*(hasher.hash(PASSWORD.decode()) for _ in range(hasher.workers)))
+        count += hasher.workers
+    return count / (time.perf_counter() - start)
+
+
+async def heartbeat_stall(work) -> float:
+    """Run `work` alongside a 10 ms ticker and return the longest gap between ticks"""
+    worst = 0.0
+    done = asyncio.Event()
+
+    async def tick():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            worst = max(worst, now - last - 0.01)
+            last = now
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0.02)
+    await work()
+    done.set()
+    await ticker
+    return worst
+
+
+async def burst(size: int, workers: int):
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+
+    async def inline():
+        for _ in range(size):
+            bcrypt.hashpw(PASSWORD, salt)
+
+    hasher = PasswordHasher(workers=workers, max_queue=size)
+
+    async def pooled():
+        await asyncio.gather(*(hasher.hash(PASSWORD.decode()) for _ in range(size)))
+
+    for name, work in (("inline", inline), ("pool", pooled)):
+        start = time.perf_counter()
+        stall = await heartbeat_stall(work)
+        total = time.perf_counter() - start
+        print(f"{name:<8}{total:>12.2f}{stall * 1000:>22.0f}")
+    await hasher.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time spent measuring each cost")
+    parser.add_argument("--workers", type=int, default=0, help="Pool size (0: one per CPU core)")
+    parser.add_argument("--burst", type=int, default=16, help="Hashes in the event-loop stall test")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Latency budget for one hash")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(workers=args.workers, max_queue=args.workers or os.cpu_count() or 1)
+    print(f"{os.cpu_count()} CPU cores, {hasher.workers} pool workers")
+    print(f"{'rounds':<8}{'ms / hash':>10}{'1 core /s':>12}{'pool /s':>10}{'per core /s':>14}")
+
+    suggested = None
+    for rounds in sorted(args.rounds):
+        settings.BCRYPT_ROUNDS = rounds
+        single = single_core_rate(rounds, args.seconds)
+        pooled = await pool_rate(hasher, args.seconds)
+        print(
+            f"{rounds:<8}{1000 / single:>10.1f}{single:>12.1f}"
+            f"{pooled:>10.1f}{pooled / hasher.workers:>14.1f}"
+        )
+        if 1000 / single <= args.target_ms:
+            suggested = rounds
+    await hasher.close()
+
+    if suggested is not None:
+        print(f"BCRYPT_ROUNDS={suggested} keeps one hash under {args.target_ms:.0f} ms")
+    else:
+        print(f"Every measured cost takes longer than {args.target_ms:.0f} ms per hash")
+
+    settings.BCRYPT_ROUNDS = suggested or min(args.rounds)
+    print(f"\n{args.burst} hashes at cost {settings.BCRYPT_ROUNDS} while a 10 ms heartbeat runs")
+    print(f"{'mode':<8}{'seconds':>12}{'worst loop stall ms':>22}")
+    await burst(args.burst, args.workers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -73,9 +73,22 @@ export const authAPI = {
 
 // Saved Papers API
 export const savedPapersAPI = {
+  getPage: async (cursor = null, limit = 100) => {
+    const params = { limit }
+    if (cursor) params.cursor = cursor
+    const response = await api.get('/saved/', { params })
+    return { papers: response.data, nextCursor: response.headers['x-next-cursor'] || null }
+  },
+
   getAll: async () => {
-    const response = await api.get('/saved/')
-    return response.data
+    const papers = []
+    let cursor = null
+    do {
+      const page = await savedPapersAPI.getPage(cursor, 500)
+      papers.push(...page.papers)
+      cursor = page.nextCursor
+    } while (cursor)
+    return papers
   },
 
   save: async (paper) => {